@@ -0,0 +1,30 @@
+import pandas as pd
+
+SUMMARY_COLUMNS = ["Paid", "Received", "Balance"]
+
+
+def _split_amounts(df):
+    is_paid = df['Type'] == 'Paid'
+    is_received = df['Type'] == 'Received'
+    return pd.DataFrame({
+        'Paid': df['Amount'].where(is_paid, 0.0),
+        'Received': df['Amount'].where(is_received, 0.0),
+    })
+
+
+def summarize(df, by):
+    """Paid/Received/Balance per group of `by` columns, in a single groupby pass"""
+    by = [by] if isinstance(by, str) else list(by)
+    if df.empty:
+        return pd.DataFrame(columns=by + SUMMARY_COLUMNS)
+    grouped = _split_amounts(df).groupby([df[col] for col in by], sort=False, observed=True).sum()
+    grouped['Balance'] = grouped['Received'] - grouped['Paid']
+    return grouped.reset_index()
+
+
+def totals(df):
+    """Overall (paid, received, balance) for a frame of transactions or rollup rows"""
+    if df.empty:
+        return 0, 0, 0
+    amounts = _split_amounts(df).sum()
+    return amounts['Paid'], amounts['Received'], amounts['Received'] - amounts['Paid']
@@ -2,13 +2,28 @@ import streamlit as st
 import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime, timedelta
+import functools
+import importlib.util
+import inspect
+import logging
+import os
 import pandas as pd
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
-from io import BytesIO
+from aggregations import summarize, totals
+from auth import CredentialIndex
+from change_feed import ChangeFeed
+from bulk_io import BulkImportError, export_csv, export_parquet, import_file, validate_file
+from coordination import Coordinator, LockedBackend
+from instrumentation import InstrumentedBackend, Metrics, logger as metrics_logger, merge_stats, stats_frame
+from jobs import DONE, FAILED, JobRunner
+from snapshot import TransactionSnapshot
+from statement_cache import StatementCache
+from storage import PAYMENT_MODES, TRANSACTION_HEADERS, TRANSACTION_TYPES, PartitionedSheetsBackend, SheetsBackend, SQLiteBackend
+from transaction_store import TransactionStore, slice_date_range
+from write_queue import WriteQueue, COMMITTED, RETRYING
+
+# Cached frames are shared read-only between sessions; writes must copy, not mutate
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # Page configuration
 st.set_page_config(
@@ -26,6 +41,40 @@ SCOPES = [
 
 SPREADSHEET_ID = "10H_Er872srJihxthzQJEUy7RwG6NS5q54G-Ex9VPOnI"
 
+ENTRY_PAGE_SIZES = [10, 25, 50, 100]
+NAME_SUGGESTIONS = 200
+# Typing a new name into a selectbox needs Streamlit 1.45+; older versions keep a plain text box
+NAME_AUTOCOMPLETE = "accept_new_options" in inspect.signature(st.selectbox).parameters
+EXPORT_FORMATS = {
+    "CSV": (export_csv, "csv", "text/csv"),
+    "Parquet": (export_parquet, "parquet", "application/vnd.apache.parquet"),
+}
+
+def get_setting(key, default):
+    """Read an optional setting from secrets, falling back to a default"""
+    try:
+        return st.secrets.get(key, default)
+    except Exception:
+        return default
+
+@st.cache_resource
+def get_metrics():
+    """Process-wide instrumentation, enabled by the diagnostics setting"""
+    metrics = Metrics(enabled=bool(get_setting("diagnostics", False)))
+    if metrics.enabled and not metrics_logger.handlers:
+        metrics_logger.addHandler(logging.StreamHandler())
+        metrics_logger.setLevel(logging.INFO)
+    return metrics
+
+metrics = get_metrics()
+metrics.start_rerun()
+
+@st.cache_resource
+def get_coordinator():
+    """Shared coordination file for app processes on this host, if configured"""
+    path = get_setting("coordination_path", None)
+    return Coordinator(path) if path else None
+
 @st.cache_resource
 def get_google_sheet():
     """Connect to Google Sheets"""
@@ -36,157 +85,331 @@ def get_google_sheet():
         )
         client = gspread.authorize(creds)
         spreadsheet = client.open_by_key(SPREADSHEET_ID)
+        if metrics.enabled:
+            metrics.count_requests(spreadsheet.client)
         return spreadsheet
     except Exception as e:
         st.error(f"Error connecting to Google Sheets: {e}")
         return None
 
-def get_transactions_sheet(spreadsheet):
-    """Get transactions sheet"""
+@st.cache_resource
+def open_storage():
+    """Open and bootstrap the configured storage backend once per process"""
+    if get_setting("storage_backend", "sheets") == "sqlite":
+        storage = SQLiteBackend(get_setting("sqlite_path", "tracker.db"))
+    else:
+        spreadsheet = get_google_sheet()
+        if not spreadsheet:
+            raise RuntimeError("no Google Sheets connection")
+        if get_setting("partition_transactions", False):
+            storage = PartitionedSheetsBackend(spreadsheet)
+        else:
+            storage = SheetsBackend(spreadsheet)
+    coordinator = get_coordinator()
+    if coordinator:
+        storage = LockedBackend(storage, coordinator)
+    if metrics.enabled:
+        storage = InstrumentedBackend(storage, metrics)
+    storage.bootstrap()
+    return storage
+
+def get_storage():
+    """Get the storage backend (Google Sheets or local SQLite), or None if unavailable"""
     try:
-        return spreadsheet.sheet1
+        return open_storage()
     except Exception as e:
-        st.error(f"Error getting transactions sheet: {e}")
+        st.error(f"Error opening storage: {e}")
         return None
 
-def get_credentials_sheet(spreadsheet):
-    """Get or create credentials sheet"""
-    try:
-        try:
-            sheet = spreadsheet.worksheet("credentials")
-        except:
-            sheet = spreadsheet.add_worksheet(title="credentials", rows="100", cols="5")
-            sheet.append_row(["Username", "Password", "Phone", "Name", "Role"])
-            sheet.append_row(["admin", "admin123", "0000000000", "Admin", "admin"])
-        return sheet
-    except Exception as e:
-        st.error(f"Error with credentials sheet: {e}")
-        return None
+@st.cache_resource
+def get_transaction_store(_storage):
+    """Shared transaction cache for all sessions in this process"""
+    coordinator = get_coordinator()
+    snapshot_path = get_setting("snapshot_path", None)
+    if snapshot_path is None and coordinator and importlib.util.find_spec("pyarrow"):
+        # Replicas share one copy of the history next to the coordination file
+        snapshot_path = os.path.join(os.path.dirname(coordinator.path), "transactions.arrow")
+    snapshot = None
+    if snapshot_path:
+        lock = functools.partial(coordinator.try_lock, "snapshot") if coordinator else None
+        snapshot = TransactionSnapshot(snapshot_path, lock=lock)
+    # With live updates the change feed is the only thing that polls storage
+    ttl = None if get_setting("live_updates_seconds", 0) else get_setting("transactions_cache_ttl", 60)
+    return TransactionStore(_storage, ttl=ttl, coordinator=coordinator, snapshot=snapshot)
 
-def authenticate_user(cred_sheet, username, password):
-    """Authenticate user against credentials sheet"""
+@st.cache_resource
+def get_change_feed(_storage):
+    """Background poller that loads new rows for every session, if live updates are on"""
+    interval = get_setting("live_updates_seconds", 0)
+    return ChangeFeed(get_transaction_store(_storage), interval=interval) if interval else None
+
+def live_fragment(func, change_feed):
+    """func re-run on the change feed's interval when live updates are on, else func itself"""
+    if change_feed is None or not hasattr(st, "fragment"):
+        return func
+    return st.fragment(func, run_every=change_feed.interval)
+
+@st.cache_resource
+def get_write_queue(_storage):
+    """Background writer that batches new transactions into storage"""
+    store = get_transaction_store(_storage)
+    return WriteQueue(_storage, get_setting("write_queue_path", "pending_writes.db"), on_commit=store.confirm)
+
+@st.cache_resource
+def get_statement_cache(_storage):
+    """Shared cache of generated statement PDFs, invalidated by new transactions"""
+    cache = StatementCache(max_bytes=get_setting("statement_cache_mb", 64) * 1024 * 1024)
+    get_transaction_store(_storage).add_listener(cache.on_append)
+    return cache
+
+@st.cache_resource
+def get_job_runner():
+    """Shared worker pool for statement and summary reports"""
+    return JobRunner(max_workers=get_setting("report_workers", 1))
+
+@st.cache_resource
+def get_credential_index(_storage):
+    """Shared in-memory credential index for all sessions in this process"""
+    return CredentialIndex(_storage, refresh_interval=get_setting("credentials_refresh_interval", 300), coordinator=get_coordinator())
+
+@metrics.timed("authenticate_user")
+def authenticate_user(index, username, password):
+    """Authenticate user against the credential index"""
     try:
-        data = cred_sheet.get_all_records()
-        for row in data:
-            if row['Username'].lower() == username.lower() and row['Password'] == password:
-                return True, row['Role'], row['Name']
-        return False, None, None
+        return index.authenticate(username, password)
     except Exception as e:
         st.error(f"Authentication error: {e}")
         return False, None, None
 
-def create_user_account(cred_sheet, username, password, phone, name):
+def create_user_account(index, username, password, phone, name):
     """Create new user account"""
     try:
-        data = cred_sheet.get_all_records()
-        for row in data:
-            if row['Username'].lower() == username.lower():
-                return False, "Username already exists"
-        cred_sheet.append_row([username, password, phone, name, "user"])
+        if not index.create(username, password, phone, name):
+            return False, "Username already exists"
         return True, "Account created successfully"
     except Exception as e:
         return False, f"Error creating account: {e}"
 
-def add_transaction(sheet, name, description, amount, transaction_type, payment_mode, username):
-    """Add a transaction to Google Sheets"""
+def add_transaction(queue, store, name, description, amount, transaction_type, payment_mode, username):
+    """Queue a transaction for the background writer and show it right away, returning its queue id"""
     try:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         row = [timestamp, username, name, description, amount, transaction_type, payment_mode]
-        sheet.append_row(row)
-        return True
+        write_id = queue.submit(row)
+        store.add_pending(write_id, row)
+        return write_id
     except Exception as e:
         st.error(f"Error adding transaction: {e}")
-        return False
+        return None
 
-def get_transactions(sheet):
-    """Get all transactions from Google Sheets"""
+def get_name_suggestions(store, username, is_admin):
+    """Most used and most recent payee names for the Name box: the user's own, or everyone's for admins"""
     try:
-        data = sheet.get_all_records()
-        if data:
-            df = pd.DataFrame(data)
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-            return df
-        return pd.DataFrame()
+        return store.suggest_names(limit=NAME_SUGGESTIONS, user=None if is_admin else username)
+    except Exception as e:
+        st.error(f"Error loading names: {e}")
+        return []
+
+def submit_entry(queue, store):
+    """Entry form callback: validate, queue the transaction and reset the form"""
+    state = st.session_state
+    if not state.name_field or not state.name_field.strip():
+        state.entry_error = "Please enter a name"
+    elif state.amount_field <= 0:
+        state.entry_error = "Please enter a valid amount"
+    elif not state.type_field:
+        state.entry_error = "Please select type (Paid or Received)"
+    elif not state.mode_field:
+        state.entry_error = "Please select payment mode"
+    else:
+        # Reuse the usual spelling of a known payee so reports do not split on case or spacing
+        name = store.canonical_name(state.name_field, None if state.is_admin else state.username)
+        write_id = add_transaction(queue, store, name, state.desc_field, state.amount_field, state.type_field, state.mode_field, state.username)
+        if write_id is not None:
+            state.pending_writes.append(write_id)
+            state.show_success = True
+            state.name_field = None if NAME_AUTOCOMPLETE else ""
+            state.amount_field = 0.0
+            state.desc_field = ""
+            state.type_field = None
+            state.mode_field = None
+
+def get_entries_page(df, page, page_size):
+    """Rows of one page of entries, newest first, without sorting the whole frame"""
+    order = df['Timestamp'].to_numpy().argsort(kind='stable')[::-1]
+    return df.iloc[order[page * page_size:(page + 1) * page_size]]
+
+def set_entries_page(page):
+    """Button callback for the entry list page cursor"""
+    st.session_state.entries_page = page
+
+def validate_upload(upload):
+    """Validate an uploaded transactions file, once per upload"""
+    if st.session_state.import_check and st.session_state.import_check[0] == upload.file_id:
+        return st.session_state.import_check[1]
+    try:
+        report = validate_file(upload, upload.name)
+    except Exception as e:
+        st.error(f"Could not read {upload.name}: {e}")
+        return None
+    st.session_state.import_check = (upload.file_id, report)
+    return report
+
+def import_upload(storage, store, upload, total, progress):
+    """Write a validated upload to storage in batches, reporting progress; returns rows written"""
+    def on_progress(written):
+        progress.progress(written / total, text=f"{written:,} of {total:,} rows imported")
+    try:
+        written = import_file(storage, upload, upload.name, min_interval=get_setting("import_min_interval", 1.0), on_progress=on_progress)
+    except BulkImportError as e:
+        st.error(str(e))
+        written = e.written
+    except Exception as e:
+        st.error(f"Error importing transactions: {e}")
+        written = 0
+    if written:
+        store.invalidate()
+    return written
+
+def export_transactions(df, export_format):
+    """Encode transactions for download in one of EXPORT_FORMATS"""
+    try:
+        return EXPORT_FORMATS[export_format][0](df)
+    except Exception as e:
+        st.error(f"Error exporting transactions: {e}")
+        return None
+
+@metrics.timed("query_transactions", rows=len)
+def query_transactions(store, user, start_date, end_date):
+    """Get one user's transactions (all users' when user is None) in a date range"""
+    try:
+        return store.query(user, start_date, end_date)
     except Exception as e:
         st.error(f"Error fetching transactions: {e}")
         return pd.DataFrame()
 
-def initialize_transactions_sheet(sheet):
-    """Initialize sheet with headers if empty"""
+@metrics.timed("get_daily_rollup", rows=len)
+def get_daily_rollup(store):
+    """Get per-day totals from the shared cache"""
     try:
-        if sheet.row_count == 0 or not sheet.row_values(1):
-            headers = ["Timestamp", "User", "Name", "Description", "Amount", "Type", "Payment Mode"]
-            sheet.append_row(headers)
+        return store.get_daily_rollup()
     except Exception as e:
-        st.error(f"Error initializing sheet: {e}")
+        st.error(f"Error fetching transactions: {e}")
+        return pd.DataFrame()
 
-def get_today_stats(df, username, is_admin):
+@metrics.timed("get_today_stats")
+def get_today_stats(store, username, is_admin):
     """Get today's statistics"""
     today = datetime.now().date()
-    if not df.empty and 'Timestamp' in df.columns:
-        df['Date'] = pd.to_datetime(df['Timestamp']).dt.date
-        today_df = df[df['Date'] == today]
-        if not is_admin:
-            today_df = today_df[today_df['User'] == username]
-        if not today_df.empty:
-            paid = today_df[today_df['Type'] == 'Paid']['Amount'].sum()
-            received = today_df[today_df['Type'] == 'Received']['Amount'].sum()
-            balance = received - paid
-            return paid, received, balance
-    return 0, 0, 0
-
-def get_user_summary(df, start_date, end_date):
+    if is_admin:
+        rollup = get_daily_rollup(store)
+        today_df = slice_date_range(rollup, today, today)
+    else:
+        today_df = query_transactions(store, username, today, today)
+    return totals(today_df)
+
+@metrics.timed("get_user_summary", rows=len)
+def get_user_summary(rollup, start_date, end_date):
     """Get summary by user for admin view"""
-    if df.empty:
+    if rollup.empty:
         return pd.DataFrame()
-    df['Date'] = pd.to_datetime(df['Timestamp']).dt.date
-    filtered_df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
+    filtered_df = slice_date_range(rollup, start_date, end_date)
     if filtered_df.empty:
         return pd.DataFrame()
-    user_summary = []
-    for user in filtered_df['User'].unique():
-        user_df = filtered_df[filtered_df['User'] == user]
-        paid = user_df[user_df['Type'] == 'Paid']['Amount'].sum()
-        received = user_df[user_df['Type'] == 'Received']['Amount'].sum()
-        balance = received - paid
-        user_summary.append({'User': user, 'Paid': paid, 'Received': received, 'Balance': balance})
-    return pd.DataFrame(user_summary)
-
-def create_pdf_statement(df, start_date, end_date, username, is_admin):
+    return summarize(filtered_df, 'User')
+
+@metrics.timed("create_pdf_statement")
+def create_pdf_statement(df, start_date, end_date, username, is_admin, progress=None):
     """Generate PDF statement"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
-    elements = []
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=colors.Color(0, 0, 104/255), spaceAfter=30, alignment=1)
-    title = Paragraph("Statement of Accounts", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    info_text = f"<b>Period:</b> {start_date.strftime('%d %b %Y')} to {end_date.strftime('%d %b %Y')}<br/>"
-    if not is_admin:
-        info_text += f"<b>User:</b> {username}<br/>"
-    info_text += f"<b>Generated on:</b> {datetime.now().strftime('%d %b %Y %I:%M %p')}"
-    info = Paragraph(info_text, styles['Normal'])
-    elements.append(info)
-    elements.append(Spacer(1, 20))
-    total_paid = df[df['Type'] == 'Paid']['Amount'].sum()
-    total_received = df[df['Type'] == 'Received']['Amount'].sum()
-    balance = total_received - total_paid
-    summary_data = [['Summary', ''], ['Total Paid', f'₹{total_paid:,.2f}'], ['Total Received', f'₹{total_received:,.2f}'], ['Net Balance', f'₹{balance:,.2f}']]
-    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.Color(0, 0, 104/255)), ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke), ('ALIGN', (0, 0), (-1, -1), 'LEFT'), ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), ('FONTSIZE', (0, 0), (-1, 0), 14), ('BOTTOMPADDING', (0, 0), (-1, 0), 12), ('BACKGROUND', (0, 1), (-1, -1), colors.beige), ('GRID', (0, 0), (-1, -1), 1, colors.black), ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'), ('FONTSIZE', (0, 1), (-1, -1), 11), ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 30))
-    table_data = [['Date', 'Name', 'Type', 'Amount', 'Payment', 'Description']]
-    for idx, row in df.sort_values('Timestamp', ascending=False).iterrows():
-        desc_value = row.get('Description', row.get('Notes', ''))
-        table_data.append([row['Timestamp'].strftime('%d %b %y'), row['Name'][:20], row['Type'], f"₹{row['Amount']:,.0f}", row['Payment Mode'], str(desc_value)[:30] if desc_value else ''])
-    transactions_table = Table(table_data, colWidths=[0.9*inch, 1.2*inch, 0.9*inch, 1*inch, 0.9*inch, 1.6*inch])
-    transactions_table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.Color(0, 0, 104/255)), ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke), ('ALIGN', (0, 0), (-1, -1), 'LEFT'), ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), ('FONTSIZE', (0, 0), (-1, 0), 10), ('BOTTOMPADDING', (0, 0), (-1, 0), 8), ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'), ('FONTSIZE', (0, 1), (-1, -1), 9), ('GRID', (0, 0), (-1, -1), 0.5, colors.grey), ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]), ('VALIGN', (0, 0), (-1, -1), 'TOP')]))
-    elements.append(transactions_table)
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    # reportlab is imported on the first export rather than on every cold start
+    import statement
+    return statement.create_pdf_statement(df, start_date, end_date, username, is_admin, progress=progress)
+
+def statement_job(cache, key, version, df, start_date, end_date, username, is_admin, progress=None):
+    """Background job: build a statement PDF and share it through the statement cache"""
+    pdf_bytes = create_pdf_statement(df, start_date, end_date, username, is_admin, progress=progress).getvalue()
+    cache.put(key, pdf_bytes, version)
+    return pdf_bytes
+
+def user_summary_job(rollup, start_date, end_date, progress=None):
+    """Background job: per-user Paid/Received/Balance for a date range as CSV"""
+    return get_user_summary(rollup, start_date, end_date).to_csv(index=False).encode()
+
+def render_today_summary(store, change_feed):
+    """Today's Paid/Received/Balance, announcing rows the change feed loaded since the last render"""
+    if change_feed is not None:
+        version, new_rows = change_feed.new_rows_since(st.session_state.feed_version)
+        st.session_state.feed_version = version
+        if new_rows:
+            st.toast(f"{new_rows} new transaction{'s' if new_rows != 1 else ''}")
+    st.markdown("### Today's Summary")
+    today_paid, today_received, today_balance = get_today_stats(store, st.session_state.username, st.session_state.is_admin)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Paid", f"₹{today_paid:,.0f}")
+    with col2:
+        st.metric("Received", f"₹{today_received:,.0f}")
+
+    st.metric("Balance", f"₹{today_balance:,.0f}")
+
+def render_user_summary(store, job_runner):
+    """Admin per-user Paid/Received/Balance for a date range"""
+    st.header("User Summary")
+    st.write("View summary of all users")
+    col1, col2 = st.columns(2)
+    with col1:
+        admin_start_date = st.date_input("Start Date", value=datetime.now().date() - timedelta(days=30), max_value=datetime.now().date(), key="admin_start_date")
+    with col2:
+        admin_end_date = st.date_input("End Date", value=datetime.now().date(), max_value=datetime.now().date(), key="admin_end_date")
+
+    if admin_start_date > admin_end_date:
+        st.error("Start date must be before end date")
+    else:
+        rollup = get_daily_rollup(store)
+        if not rollup.empty:
+            user_summary_df = get_user_summary(rollup, admin_start_date, admin_end_date)
+            if not user_summary_df.empty:
+                st.subheader(f"Summary from {admin_start_date.strftime('%d %b %Y')} to {admin_end_date.strftime('%d %b %Y')}")
+                st.dataframe(user_summary_df.style.format({'Paid': '₹{:,.0f}', 'Received': '₹{:,.0f}', 'Balance': '₹{:,.0f}'}), use_container_width=True, hide_index=True)
+                summary_key = ("user_summary", admin_start_date, admin_end_date, int(rollup['Count'].sum()))
+                if st.button("Queue CSV Report", key="summary_report_btn", use_container_width=True):
+                    job_runner.submit(summary_key, f"User summary {admin_start_date.strftime('%d %b %Y')} to {admin_end_date.strftime('%d %b %Y')}", f"user_summary_{admin_start_date}_{admin_end_date}.csv", "text/csv", user_summary_job, rollup, admin_start_date, admin_end_date)
+                    st.info("Report queued. Download it from the Reports tab.")
+                st.markdown("---")
+                st.subheader("Overall Totals")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Total Paid (All Users)", f"₹{user_summary_df['Paid'].sum():,.0f}")
+                with col2:
+                    st.metric("Total Received (All Users)", f"₹{user_summary_df['Received'].sum():,.0f}")
+                with col3:
+                    st.metric("Total Balance", f"₹{user_summary_df['Balance'].sum():,.0f}")
+            else:
+                st.info("No transactions found in selected date range.")
+        else:
+            st.info("No transactions available.")
+
+def render_jobs(job_runner):
+    """List background reports with their progress and download buttons"""
+    jobs = job_runner.jobs()
+    if not jobs:
+        st.info("No reports yet. Statements and summaries you queue will appear here.")
+        return
+    for job in jobs:
+        with st.container():
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.markdown(f"**{job.label}**")
+                st.caption(f"{job.status.capitalize()} • queued {datetime.fromtimestamp(job.created_at).strftime('%d %b %I:%M %p')}")
+            with col2:
+                if job.status == DONE:
+                    st.download_button("Download", data=job.result, file_name=job.filename, mime=job.mime, key=f"job_download_{job.id}", use_container_width=True)
+            if not job.finished:
+                st.progress(job.progress)
+            if job.status == FAILED:
+                st.error(f"Failed: {job.error}")
+            st.markdown("---")
 
 # Navy Blue Theme CSS - RGB(0,0,104) - Mobile Optimized
 st.markdown("""
@@ -242,6 +465,41 @@ st.markdown("""
         box-shadow: 0 2px 8px rgba(0, 0, 104, 0.3) !important;
     }
 
+    /* Type / Payment Mode choices - radio options styled as a 2-column button grid */
+    .stRadio [role="radiogroup"] {
+        display: grid !important;
+        grid-template-columns: 1fr 1fr;
+        gap: 4px;
+    }
+
+    .stRadio [role="radiogroup"] label {
+        justify-content: center;
+        height: 50px;
+        margin: 0 !important;
+        background: #e6f2ff;
+        border: 2px solid #99ccff;
+        border-radius: 6px;
+    }
+
+    .stRadio [role="radiogroup"] label > div:first-child {
+        display: none;
+    }
+
+    .stRadio [role="radiogroup"] label p {
+        font-size: 14px !important;
+        font-weight: bold;
+        color: rgb(0, 0, 104);
+    }
+
+    .stRadio [role="radiogroup"] label:has(input:checked) {
+        background: rgb(0, 0, 104);
+        border-color: rgb(0, 0, 104);
+    }
+
+    .stRadio [role="radiogroup"] label:has(input:checked) p {
+        color: white;
+    }
+
     /* Text inputs - Compact */
     .stTextInput > div > div > input,
     .stNumberInput > div > div > input {
@@ -351,84 +609,90 @@ if 'display_name' not in st.session_state:
     st.session_state.display_name = ""
 if 'is_admin' not in st.session_state:
     st.session_state.is_admin = False
-if 'transaction_type' not in st.session_state:
-    st.session_state.transaction_type = None
-if 'payment_mode' not in st.session_state:
-    st.session_state.payment_mode = None
 if 'show_register' not in st.session_state:
     st.session_state.show_register = False
 if 'show_success' not in st.session_state:
     st.session_state.show_success = False
-if 'name_input' not in st.session_state:
-    st.session_state.name_input = ""
-if 'amount_input' not in st.session_state:
-    st.session_state.amount_input = 0.0
-if 'description_input' not in st.session_state:
-    st.session_state.description_input = ""
+if 'entry_error' not in st.session_state:
+    st.session_state.entry_error = None
+if 'pending_writes' not in st.session_state:
+    st.session_state.pending_writes = []
+if 'entries_page' not in st.session_state:
+    st.session_state.entries_page = 0
+if 'entries_range' not in st.session_state:
+    st.session_state.entries_range = None
+if 'export' not in st.session_state:
+    st.session_state.export = None
+if 'import_check' not in st.session_state:
+    st.session_state.import_check = None
+if 'imported_file' not in st.session_state:
+    st.session_state.imported_file = None
+if 'diagnostics_last' not in st.session_state:
+    st.session_state.diagnostics_last = {}
+if 'diagnostics_session' not in st.session_state:
+    st.session_state.diagnostics_session = {}
+if 'feed_version' not in st.session_state:
+    st.session_state.feed_version = None
 
 # Login/Registration section
 if not st.session_state.logged_in:
     st.title("Login")
 
-    spreadsheet = get_google_sheet()
-    if spreadsheet:
-        cred_sheet = get_credentials_sheet(spreadsheet)
-        if cred_sheet:
-            if not st.session_state.show_register:
-                username = st.text_input("Username", key="login_username", placeholder="Enter your username")
-                password = st.text_input("Password", type="password", key="login_password", placeholder="Enter password")
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("Login", key="login_btn", use_container_width=True, type="primary"):
-                        if username and password:
-                            success, role, name = authenticate_user(cred_sheet, username, password)
-                            if success:
-                                st.session_state.logged_in = True
-                                st.session_state.username = username
-                                st.session_state.display_name = name
-                                st.session_state.is_admin = (role == "admin")
-                                st.rerun()
-                            else:
-                                st.error("Invalid username or password")
-                        else:
-                            st.warning("Please enter username and password")
-                with col2:
-                    if st.button("Create Account", key="create_account_btn", use_container_width=True):
-                        st.session_state.show_register = True
-                        st.rerun()
-            else:
-                st.subheader("Create New Account")
-                new_name = st.text_input("Full Name", key="reg_name", placeholder="Enter your full name")
-                new_phone = st.text_input("Phone Number", key="reg_phone", placeholder="Enter your phone number")
-                new_username = st.text_input("Username", key="reg_username", placeholder="Choose a username")
-                new_password = st.text_input("Password", key="reg_password", placeholder="Choose a password")
-                confirm_password = st.text_input("Confirm Password", key="reg_confirm_password", placeholder="Confirm your password")
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("Register", key="register_btn", use_container_width=True, type="primary"):
-                        if not all([new_name, new_phone, new_username, new_password]):
-                            st.error("Please fill all fields")
-                        elif new_password != confirm_password:
-                            st.error("Passwords do not match")
-                        elif len(new_password) < 4:
-                            st.error("Password must be at least 4 characters")
+    storage = get_storage()
+    if storage:
+        if not st.session_state.show_register:
+            username = st.text_input("Username", key="login_username", placeholder="Enter your username")
+            password = st.text_input("Password", type="password", key="login_password", placeholder="Enter password")
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Login", key="login_btn", use_container_width=True, type="primary"):
+                    if username and password:
+                        success, role, name = authenticate_user(get_credential_index(storage), username, password)
+                        if success:
+                            st.session_state.logged_in = True
+                            st.session_state.username = username
+                            st.session_state.display_name = name
+                            st.session_state.is_admin = (role == "admin")
+                            st.rerun()
                         else:
-                            success, message = create_user_account(cred_sheet, new_username, new_password, new_phone, new_name)
-                            if success:
-                                st.success(message)
-                                st.info("Please login with your new credentials")
-                                st.session_state.show_register = False
-                                st.rerun()
-                            else:
-                                st.error(message)
-                with col2:
-                    if st.button("Back to Login", key="back_login_btn", use_container_width=True):
-                        st.session_state.show_register = False
-                        st.rerun()
+                            st.error("Invalid username or password")
+                    else:
+                        st.warning("Please enter username and password")
+            with col2:
+                if st.button("Create Account", key="create_account_btn", use_container_width=True):
+                    st.session_state.show_register = True
+                    st.rerun()
         else:
-            st.error("Could not access credentials sheet")
+            st.subheader("Create New Account")
+            new_name = st.text_input("Full Name", key="reg_name", placeholder="Enter your full name")
+            new_phone = st.text_input("Phone Number", key="reg_phone", placeholder="Enter your phone number")
+            new_username = st.text_input("Username", key="reg_username", placeholder="Choose a username")
+            new_password = st.text_input("Password", key="reg_password", placeholder="Choose a password")
+            confirm_password = st.text_input("Confirm Password", key="reg_confirm_password", placeholder="Confirm your password")
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Register", key="register_btn", use_container_width=True, type="primary"):
+                    if not all([new_name, new_phone, new_username, new_password]):
+                        st.error("Please fill all fields")
+                    elif new_password != confirm_password:
+                        st.error("Passwords do not match")
+                    elif len(new_password) < 4:
+                        st.error("Password must be at least 4 characters")
+                    else:
+                        success, message = create_user_account(get_credential_index(storage), new_username, new_password, new_phone, new_name)
+                        if success:
+                            st.success(message)
+                            st.info("Please login with your new credentials")
+                            st.session_state.show_register = False
+                            st.rerun()
+                        else:
+                            st.error(message)
+            with col2:
+                if st.button("Back to Login", key="back_login_btn", use_container_width=True):
+                    st.session_state.show_register = False
+                    st.rerun()
     else:
-        st.error("Could not connect to Google Sheets")
+        st.error("Could not connect to storage")
 
 else:
     # Logout button at top right
@@ -439,198 +703,232 @@ else:
             st.session_state.username = ""
             st.session_state.display_name = ""
             st.session_state.is_admin = False
-            st.session_state.transaction_type = None
-            st.session_state.payment_mode = None
             st.rerun()
 
-    spreadsheet = get_google_sheet()
-    if spreadsheet:
-        trans_sheet = get_transactions_sheet(spreadsheet)
-        if trans_sheet:
-            initialize_transactions_sheet(trans_sheet)
-            df = get_transactions(trans_sheet)
-            user_df = df.copy() if not df.empty else df
-            if not df.empty and not st.session_state.is_admin:
-                user_df = df[df['User'] == st.session_state.username]
-
-            # TODAY'S KPI BOXES - Paid and Received side by side, Balance below
-            st.markdown("### Today's Summary")
-            today_paid, today_received, today_balance = get_today_stats(user_df, st.session_state.username, st.session_state.is_admin)
-
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Paid", f"₹{today_paid:,.0f}")
-            with col2:
-                st.metric("Received", f"₹{today_received:,.0f}")
-
-            st.metric("Balance", f"₹{today_balance:,.0f}")
-            st.markdown("---")
-
-            # TABS
-            if st.session_state.is_admin:
-                tab1, tab2, tab3 = st.tabs(["New Entry", "Download Statement", "User Summary"])
-            else:
-                tab1, tab2 = st.tabs(["New Entry", "Download Statement"])
+    storage = get_storage()
+    if storage:
+        store = get_transaction_store(storage)
+        write_queue = get_write_queue(storage)
+
+        change_feed = get_change_feed(storage)
+
+        # TODAY'S KPI BOXES - Paid and Received side by side, Balance below
+        live_fragment(render_today_summary, change_feed)(store, change_feed)
+        st.markdown("---")
+
+        # TABS
+        diagnostics_tab = []
+        if st.session_state.is_admin:
+            job_runner = get_job_runner()
+            tab_names = ["New Entry", "Download Statement", "User Summary", "Bulk Import", "Reports"]
+            if metrics.enabled:
+                tab_names.append("Diagnostics")
+            tab1, tab2, tab3, tab4, tab5, *diagnostics_tab = st.tabs(tab_names)
+        else:
+            tab1, tab2 = st.tabs(["New Entry", "Download Statement"])
 
-            with tab1:
-                st.header("New Entry")
+        with tab1:
+            st.header("New Entry")
 
-                name = st.text_input("Name", value=st.session_state.name_input, placeholder="Enter person/vendor name", key="name_field")
-                amount = st.number_input("Amount (₹)", value=st.session_state.amount_input, min_value=0.0, step=10.0, format="%.0f", key="amount_field")
-                description = st.text_input("Description", value=st.session_state.description_input, placeholder="Add details...", key="desc_field")
+            # Selections stay in the browser until Submit, so a transaction costs a single rerun
+            with st.form("entry_form"):
+                if NAME_AUTOCOMPLETE:
+                    # The browser narrows the ranked names as the user types; a new name can still be entered
+                    st.selectbox("Name", get_name_suggestions(store, st.session_state.username, st.session_state.is_admin), index=None, accept_new_options=True, placeholder="Enter person/vendor name", key="name_field")
+                else:
+                    st.text_input("Name", placeholder="Enter person/vendor name", key="name_field")
+                st.number_input("Amount (₹)", min_value=0.0, step=10.0, format="%.0f", key="amount_field")
+                st.text_input("Description", placeholder="Add details...", key="desc_field")
 
                 st.subheader("Type")
-                # Hardcoded 2 columns for Type buttons
-                col1, col2 = st.columns([1, 1])
-                with col1:
-                    btn_type = "primary" if st.session_state.transaction_type == "Paid" else "secondary"
-                    if st.button("PAID", use_container_width=True, type=btn_type, key="btn_paid"):
-                        st.session_state.transaction_type = "Paid"
-                        st.rerun()
-                with col2:
-                    btn_type = "primary" if st.session_state.transaction_type == "Received" else "secondary"
-                    if st.button("RECEIVED", use_container_width=True, type=btn_type, key="btn_received"):
-                        st.session_state.transaction_type = "Received"
-                        st.rerun()
+                st.radio("Type", TRANSACTION_TYPES, index=None, horizontal=True, format_func=str.upper, label_visibility="collapsed", key="type_field")
 
-                # Payment Mode Buttons - Hardcoded 2x2 layout (2 rows, 2 columns)
                 st.subheader("Payment Mode")
-
-                # Row 1: Online and GPay
-                col1, col2 = st.columns([1, 1])
-                with col1:
-                    btn_type = "primary" if st.session_state.payment_mode == "Online" else "secondary"
-                    if st.button("Online", use_container_width=True, type=btn_type, key="btn_online"):
-                        st.session_state.payment_mode = "Online"
-                        st.rerun()
-                with col2:
-                    btn_type = "primary" if st.session_state.payment_mode == "GPay" else "secondary"
-                    if st.button("GPay", use_container_width=True, type=btn_type, key="btn_gpay"):
-                        st.session_state.payment_mode = "GPay"
-                        st.rerun()
-
-                # Row 2: PhonePe and Cash
-                col3, col4 = st.columns([1, 1])
-                with col3:
-                    btn_type = "primary" if st.session_state.payment_mode == "PhonePe" else "secondary"
-                    if st.button("PhonePe", use_container_width=True, type=btn_type, key="btn_phone"):
-                        st.session_state.payment_mode = "PhonePe"
-                        st.rerun()
-                with col4:
-                    btn_type = "primary" if st.session_state.payment_mode == "Cash" else "secondary"
-                    if st.button("Cash", use_container_width=True, type=btn_type, key="btn_cash"):
-                        st.session_state.payment_mode = "Cash"
-                        st.rerun()
+                st.radio("Payment Mode", PAYMENT_MODES, index=None, horizontal=True, label_visibility="collapsed", key="mode_field")
 
                 st.markdown("")  # spacing
 
-                # Submit button
-                if st.button("Submit Transaction", use_container_width=True, type="primary", key="btn_submit"):
-                    if not name:
-                        st.error("Please enter a name")
-                    elif amount <= 0:
-                        st.error("Please enter a valid amount")
-                    elif not st.session_state.transaction_type:
-                        st.error("Please select type (Paid or Received)")
-                    elif not st.session_state.payment_mode:
-                        st.error("Please select payment mode")
-                    else:
-                        if add_transaction(trans_sheet, name, description, amount, st.session_state.transaction_type, st.session_state.payment_mode, st.session_state.username):
-                            st.session_state.show_success = True
-                            st.session_state.transaction_type = None
-                            st.session_state.payment_mode = None
-                            st.session_state.name_input = ""
-                            st.session_state.amount_input = 0.0
-                            st.session_state.description_input = ""
-                            st.rerun()
-
-                # Show success message right after submit button
-                if st.session_state.show_success:
-                    st.success("Transaction submitted successfully!")
-                    st.session_state.show_success = False
-
-            with tab2:
-                st.header("Download Statement")
-                st.write("Select date range to download your statement")
-                col1, col2 = st.columns(2)
-                with col1:
-                    start_date = st.date_input("Start Date", value=datetime.now().date() - timedelta(days=30), max_value=datetime.now().date(), key="start_date")
-                with col2:
-                    end_date = st.date_input("End Date", value=datetime.now().date(), max_value=datetime.now().date(), key="end_date")
+                st.form_submit_button("Submit Transaction", use_container_width=True, type="primary", on_click=submit_entry, args=(write_queue, store))
+
+            if st.session_state.entry_error:
+                st.error(st.session_state.entry_error)
+                st.session_state.entry_error = None
+
+            # Show success message right after submit button
+            if st.session_state.show_success:
+                st.success("Transaction submitted successfully!")
+                st.session_state.show_success = False
+
+            # Sync status of this session's queued transactions
+            if st.session_state.pending_writes:
+                statuses = write_queue.status(st.session_state.pending_writes)
+                waiting = [i for i in st.session_state.pending_writes if statuses.get(i, (COMMITTED, None))[0] != COMMITTED]
+                retrying = [statuses[i][1] for i in waiting if statuses[i][0] == RETRYING]
+                if retrying:
+                    st.warning(f"{len(waiting)} transaction(s) waiting to sync, retrying: {retrying[-1]}")
+                elif waiting:
+                    st.info(f"{len(waiting)} transaction(s) saving...")
+                st.session_state.pending_writes = waiting
+
+        with tab2:
+            st.header("Download Statement")
+            st.write("Select date range to download your statement")
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input("Start Date", value=datetime.now().date() - timedelta(days=30), max_value=datetime.now().date(), key="start_date")
+            with col2:
+                end_date = st.date_input("End Date", value=datetime.now().date(), max_value=datetime.now().date(), key="end_date")
 
-                if start_date > end_date:
-                    st.error("Start date must be before end date")
-                else:
-                    if not user_df.empty:
-                        user_df['Date'] = pd.to_datetime(user_df['Timestamp']).dt.date
-                        filtered_df = user_df[(user_df['Date'] >= start_date) & (user_df['Date'] <= end_date)]
-                        if not filtered_df.empty:
-                            total_paid = filtered_df[filtered_df['Type'] == 'Paid']['Amount'].sum()
-                            total_received = filtered_df[filtered_df['Type'] == 'Received']['Amount'].sum()
-                            balance = total_received - total_paid
-                            st.subheader("Summary")
-                            col1, col2, col3 = st.columns(3)
+            if start_date > end_date:
+                st.error("Start date must be before end date")
+            else:
+                statement_user = None if st.session_state.is_admin else st.session_state.username
+                statement_cache = get_statement_cache(storage)
+                statement_key = (statement_user, start_date, end_date)
+                # Read before the query, so an entry in range stored after it keeps a statement built from it out of the cache
+                statement_version = statement_cache.version(statement_key)
+                filtered_df = query_transactions(store, statement_user, start_date, end_date)
+                if not filtered_df.empty:
+                    total_paid, total_received, balance = totals(filtered_df)
+                    st.subheader("Summary")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Total Paid", f"₹{total_paid:,.0f}")
+                    with col2:
+                        st.metric("Total Received", f"₹{total_received:,.0f}")
+                    with col3:
+                        st.metric("Net Balance", f"₹{balance:,.0f}")
+                    st.markdown("---")
+                    st.subheader(f"All Entries ({len(filtered_df)} total)")
+                    # Only the current page is sorted out of the range and rendered
+                    page_size = st.selectbox("Entries per page", ENTRY_PAGE_SIZES, key="entries_page_size")
+                    page_count = -(-len(filtered_df) // page_size)
+                    if st.session_state.entries_range != (start_date, end_date):
+                        st.session_state.entries_range = (start_date, end_date)
+                        st.session_state.entries_page = 0
+                    page = min(st.session_state.entries_page, page_count - 1)
+                    for idx, row in get_entries_page(filtered_df, page, page_size).iterrows():
+                        type_emoji = "" if row['Type'] == 'Paid' else ""
+                        amount_color = "red" if row['Type'] == 'Paid' else "green"
+                        desc_value = row.get('Description', row.get('Notes', ''))
+                        with st.container():
+                            col1, col2 = st.columns([3, 1])
                             with col1:
-                                st.metric("Total Paid", f"₹{total_paid:,.0f}")
+                                st.markdown(f"**{row['Name']}**")
+                                st.caption(f"{row['Payment Mode']} • {row['Timestamp'].strftime('%d %b %Y %I:%M %p')}")
+                                if desc_value:
+                                    st.caption(f"{desc_value}")
                             with col2:
-                                st.metric("Total Received", f"₹{total_received:,.0f}")
-                            with col3:
-                                st.metric("Net Balance", f"₹{balance:,.0f}")
+                                st.markdown(f"**<span style='color:{amount_color}'>₹{row['Amount']:,.0f}</span>**", unsafe_allow_html=True)
                             st.markdown("---")
-                            st.subheader(f"All Entries ({len(filtered_df)} total)")
-                            for idx, row in filtered_df.sort_values('Timestamp', ascending=False).iterrows():
-                                type_emoji = "" if row['Type'] == 'Paid' else ""
-                                amount_color = "red" if row['Type'] == 'Paid' else "green"
-                                desc_value = row.get('Description', row.get('Notes', ''))
-                                with st.container():
-                                    col1, col2 = st.columns([3, 1])
-                                    with col1:
-                                        st.markdown(f"**{row['Name']}**")
-                                        st.caption(f"{row['Payment Mode']} • {row['Timestamp'].strftime('%d %b %Y %I:%M %p')}")
-                                        if desc_value:
-                                            st.caption(f"{desc_value}")
-                                    with col2:
-                                        st.markdown(f"**<span style='color:{amount_color}'>₹{row['Amount']:,.0f}</span>**", unsafe_allow_html=True)
-                                    st.markdown("---")
-                            pdf_buffer = create_pdf_statement(filtered_df, start_date, end_date, st.session_state.username, st.session_state.is_admin)
-                            st.download_button(label="Download as PDF", data=pdf_buffer, file_name=f"statement_{start_date}_{end_date}.pdf", mime="application/pdf", use_container_width=True)
-                        else:
-                            st.info("No entries found in selected date range.")
-                    else:
-                        st.info("No entries available.")
-
-            if st.session_state.is_admin:
-                with tab3:
-                    st.header("User Summary")
-                    st.write("View summary of all users")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        admin_start_date = st.date_input("Start Date", value=datetime.now().date() - timedelta(days=30), max_value=datetime.now().date(), key="admin_start_date")
-                    with col2:
-                        admin_end_date = st.date_input("End Date", value=datetime.now().date(), max_value=datetime.now().date(), key="admin_end_date")
-
-                    if admin_start_date > admin_end_date:
-                        st.error("Start date must be before end date")
-                    else:
-                        if not df.empty:
-                            user_summary_df = get_user_summary(df, admin_start_date, admin_end_date)
-                            if not user_summary_df.empty:
-                                st.subheader(f"Summary from {admin_start_date.strftime('%d %b %Y')} to {admin_end_date.strftime('%d %b %Y')}")
-                                st.dataframe(user_summary_df.style.format({'Paid': '₹{:,.0f}', 'Received': '₹{:,.0f}', 'Balance': '₹{:,.0f}'}), use_container_width=True, hide_index=True)
-                                st.markdown("---")
-                                st.subheader("Overall Totals")
-                                col1, col2, col3 = st.columns(3)
-                                with col1:
-                                    st.metric("Total Paid (All Users)", f"₹{user_summary_df['Paid'].sum():,.0f}")
-                                with col2:
-                                    st.metric("Total Received (All Users)", f"₹{user_summary_df['Received'].sum():,.0f}")
-                                with col3:
-                                    st.metric("Total Balance", f"₹{user_summary_df['Balance'].sum():,.0f}")
-                            else:
-                                st.info("No transactions found in selected date range.")
+                    if page_count > 1:
+                        col1, col2, col3 = st.columns([1, 2, 1])
+                        with col1:
+                            st.button("Previous", key="entries_prev_btn", use_container_width=True, disabled=page == 0, on_click=set_entries_page, args=(page - 1,))
+                        with col2:
+                            st.caption(f"Page {page + 1} of {page_count}")
+                        with col3:
+                            st.button("Next", key="entries_next_btn", use_container_width=True, disabled=page >= page_count - 1, on_click=set_entries_page, args=(page + 1,))
+                    # Build the PDF only when asked for; identical statements are served from the shared cache
+                    pdf_bytes = statement_cache.get(statement_key)
+                    if pdf_bytes is None and st.session_state.is_admin:
+                        # All-user statements can be long; build them off the script thread
+                        job_key = ("statement", *statement_key, statement_version)
+                        job = job_runner.find(job_key)
+                        if job is not None and job.status == FAILED:
+                            st.error(f"Statement failed: {job.error}")
+                        if job is None or job.status == FAILED:
+                            if st.button("Prepare PDF", key="prepare_pdf_btn", use_container_width=True, type="primary"):
+                                job = job_runner.submit(job_key, f"Statement {start_date.strftime('%d %b %Y')} to {end_date.strftime('%d %b %Y')}", f"statement_{start_date}_{end_date}.pdf", "application/pdf", statement_job, statement_cache, statement_key, statement_version, filtered_df, start_date, end_date, st.session_state.username, True)
+                        if job is not None and job.status == DONE:
+                            pdf_bytes = job.result
+                        elif job is not None and not job.finished:
+                            st.info(f"Statement is being generated ({job.progress:.0%}). It will be ready here and under Reports.")
+                    elif pdf_bytes is None:
+                        prepare_slot = st.empty()
+                        if prepare_slot.button("Prepare PDF", key="prepare_pdf_btn", use_container_width=True, type="primary"):
+                            prepare_slot.empty()
+                            with st.spinner("Generating statement..."):
+                                pdf_bytes = create_pdf_statement(filtered_df, start_date, end_date, st.session_state.username, st.session_state.is_admin).getvalue()
+                            statement_cache.put(statement_key, pdf_bytes, statement_version)
+                    if pdf_bytes is not None:
+                        st.download_button(label="Download as PDF", data=pdf_bytes, file_name=f"statement_{start_date}_{end_date}.pdf", mime="application/pdf", use_container_width=True)
+
+                    st.markdown("---")
+                    st.subheader("Export Data")
+                    export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+                    # Kept for this session; a changed row count means the range has new entries
+                    export_key = (statement_key, export_format, len(filtered_df))
+                    if st.session_state.export is None or st.session_state.export[0] != export_key:
+                        if st.button("Prepare Export", key="prepare_export_btn", use_container_width=True):
+                            with st.spinner("Exporting transactions..."):
+                                export_data = export_transactions(filtered_df, export_format)
+                            if export_data is not None:
+                                st.session_state.export = (export_key, export_data)
+                    if st.session_state.export is not None and st.session_state.export[0] == export_key:
+                        _, extension, mime = EXPORT_FORMATS[export_format]
+                        st.download_button(label=f"Download as {export_format}", data=st.session_state.export[1], file_name=f"transactions_{start_date}_{end_date}.{extension}", mime=mime, use_container_width=True)
+                else:
+                    st.info("No entries found in selected date range.")
+
+        if st.session_state.is_admin:
+            with tab3:
+                live_fragment(render_user_summary, change_feed)(store, job_runner)
+
+        if st.session_state.is_admin:
+            with tab4:
+                st.header("Bulk Import")
+                st.write("Upload a CSV or Excel file with the columns " + ", ".join(TRANSACTION_HEADERS) + " (Description may be empty)")
+                upload = st.file_uploader("Transactions file", type=["csv", "xlsx"], key="import_file")
+                if upload is not None:
+                    report = validate_upload(upload)
+                    if report is not None:
+                        valid_rows, errors, error_count = report
+                        if st.session_state.imported_file == upload.file_id:
+                            st.success(f"Imported {valid_rows:,} transactions from {upload.name}")
+                        elif error_count:
+                            st.error(f"{error_count:,} row(s) need fixing before this file can be imported")
+                            st.dataframe(pd.DataFrame(errors, columns=["Line", "Problem"]), use_container_width=True, hide_index=True)
+                        elif not valid_rows:
+                            st.info("The file has no transactions.")
                         else:
-                            st.info("No transactions available.")
-        else:
-            st.error("Could not access transactions sheet")
+                            st.info(f"{valid_rows:,} transactions ready to import")
+                            if st.button("Import Transactions", key="import_btn", use_container_width=True, type="primary"):
+                                progress = st.progress(0.0)
+                                written = import_upload(storage, store, upload, valid_rows, progress)
+                                if written == valid_rows:
+                                    st.session_state.imported_file = upload.file_id
+                                    st.success(f"Imported {written:,} transactions from {upload.name}")
+
+        if st.session_state.is_admin:
+            with tab5:
+                st.header("Reports")
+                st.write("Statements and summaries generated in the background")
+                if hasattr(st, "fragment"):
+                    # Poll only while something is queued or running, or at the live-update
+                    # pace so reports queued from a live User Summary still show up
+                    idle_every = change_feed.interval if change_feed else None
+                    st.fragment(render_jobs, run_every=2 if job_runner.active() else idle_every)(job_runner)
+                else:
+                    render_jobs(job_runner)
+                    st.button("Refresh", key="reports_refresh_btn", use_container_width=True)
+
+        if diagnostics_tab:
+            with diagnostics_tab[0]:
+                st.header("Diagnostics")
+                st.write("Wall time, calls and rows per instrumented section")
+                st.subheader("Previous rerun")
+                st.dataframe(stats_frame(st.session_state.diagnostics_last), use_container_width=True, hide_index=True)
+                st.subheader("This session")
+                st.dataframe(stats_frame(st.session_state.diagnostics_session), use_container_width=True, hide_index=True)
+                st.subheader("All sessions since startup")
+                st.dataframe(stats_frame(metrics.totals()), use_container_width=True, hide_index=True)
+                st.download_button(label="Download Prometheus metrics", data=metrics.prometheus(), file_name="metrics.prom", mime="text/plain", use_container_width=True)
     else:
-        st.error("Failed to connect to Google Sheets. Please check your configuration.")
+        st.error("Failed to connect to storage. Please check your configuration.")
+
+# Record this rerun once the whole page has rendered
+rerun_stats = metrics.end_rerun(user=st.session_state.username)
+if rerun_stats:
+    st.session_state.diagnostics_last = rerun_stats
+    merge_stats(st.session_state.diagnostics_session, rerun_stats)
@@ -0,0 +1,121 @@
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+
+HASH_SCHEME = "pbkdf2_sha256"
+HASH_ITERATIONS = 100_000
+
+logger = logging.getLogger("tracker.auth")
+
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    """Hash a password as 'pbkdf2_sha256$iterations$salt$hash'"""
+    salt = salt or os.urandom(16).hex()
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations).hex()
+    return f"{HASH_SCHEME}${iterations}${salt}${digest}"
+
+
+# Verified against when the username is unknown, so misses cost as much as hits
+_DUMMY_HASH = hash_password("", salt="00" * 16)
+
+
+def is_hashed(stored):
+    return str(stored).startswith(HASH_SCHEME + "$")
+
+
+def verify_password(password, stored):
+    """Constant-time check of a password against a stored hash (or legacy plaintext)"""
+    stored = str(stored)
+    if is_hashed(stored):
+        _, iterations, salt, digest = stored.split("$")
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations)).hex()
+        return hmac.compare_digest(candidate, digest)
+    # Accounts created before hashing still hold plaintext; pay the hashing cost anyway
+    verify_password(password, _DUMMY_HASH)
+    return hmac.compare_digest(stored.encode(), password.encode())
+
+
+class CredentialIndex:
+    """In-memory account lookup keyed by lowercased username
+
+    With a coordinator, usernames are reserved host-wide before an account is
+    stored, and accounts created by other processes are picked up immediately.
+    Accounts still holding a plaintext password from before hashing are
+    rehashed in storage on their first successful login.
+    """
+
+    GENERATION = "credentials"
+
+    def __init__(self, backend, refresh_interval=300, coordinator=None):
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+        self.coordinator = coordinator
+        self._lock = threading.RLock()
+        self._users = None
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def _load(self):
+        if self.coordinator:
+            self._generation = self.coordinator.generation(self.GENERATION)
+        self._users = {str(row['Username']).lower(): row for row in self.backend.read_credentials()}
+        self._loaded_at = time.monotonic()
+        if self.coordinator:
+            self.coordinator.reserve_usernames(self._users)
+
+    def _get(self, username):
+        with self._lock:
+            # Unknown names trigger at most one reload per interval, so repeated
+            # bad logins cannot turn into repeated credential downloads
+            stale = time.monotonic() - self._loaded_at >= self.refresh_interval
+            if self.coordinator and self.coordinator.generation(self.GENERATION) != self._generation:
+                stale = True
+            if self._users is None or (username.lower() not in self._users and stale):
+                self._load()
+            return self._users.get(username.lower())
+
+    def authenticate(self, username, password):
+        """Return (success, role, name) for a login attempt"""
+        user = self._get(username)
+        valid = verify_password(password, user['Password'] if user else _DUMMY_HASH)
+        if user and valid:
+            if not is_hashed(user['Password']):
+                self._rehash(user, password)
+            return True, user['Role'], user['Name']
+        return False, None, None
+
+    def _rehash(self, user, password):
+        password_hash = hash_password(password)
+        try:
+            self.backend.update_password(user['Username'], password_hash)
+        except Exception:
+            # The login itself succeeded; try again next time
+            logger.warning("Could not rehash the password of %s", user['Username'], exc_info=True)
+            return
+        with self._lock:
+            user['Password'] = password_hash
+
+    def create(self, username, password, phone, name):
+        """Store a new account with a hashed password; False if the username is taken"""
+        row = [username, hash_password(password), phone, name, "user"]
+        with self._lock:
+            if self._get(username):
+                return False
+            if self.coordinator and not self.coordinator.reserve_username(username):
+                return False
+            try:
+                self.backend.append_credential(row)
+            except Exception:
+                if self.coordinator:
+                    self.coordinator.release_username(username)
+                raise
+            self._users[username.lower()] = dict(zip(["Username", "Password", "Phone", "Name", "Role"], row))
+            if self.coordinator:
+                generation = self.coordinator.bump(self.GENERATION)
+                # Skip the reload our own bump would trigger unless another process also wrote
+                if generation == self._generation + 1:
+                    self._generation = generation
+        return True
@@ -0,0 +1,57 @@
+"""Compare the per-user loop summary with the vectorized groupby in aggregations.py
+
+Run from the repository root: python -m benchmarks.bench_aggregations
+"""
+import time
+
+import pandas as pd
+
+from aggregations import summarize, totals
+from benchmarks.data import synthetic_transactions
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def loop_user_summary(df):
+    """The previous get_user_summary implementation: one pair of masks per user"""
+    user_summary = []
+    for user in df['User'].unique():
+        user_df = df[df['User'] == user]
+        paid = user_df[user_df['Type'] == 'Paid']['Amount'].sum()
+        received = user_df[user_df['Type'] == 'Received']['Amount'].sum()
+        user_summary.append({'User': user, 'Paid': paid, 'Received': received, 'Balance': received - paid})
+    return pd.DataFrame(user_summary)
+
+
+def loop_totals(df):
+    paid = df[df['Type'] == 'Paid']['Amount'].sum()
+    received = df[df['Type'] == 'Received']['Amount'].sum()
+    return paid, received, received - paid
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    print(f"{'rows':>10} {'loop users':>12} {'groupby users':>14} {'user/day/mode':>14} {'loop totals':>12} {'totals':>8}  (ms)")
+    for n in SIZES:
+        df = synthetic_transactions(n)
+        df['Date'] = df['Timestamp'].dt.date
+        print(
+            f"{n:>10} "
+            f"{best_of(lambda: loop_user_summary(df)):>12.1f} "
+            f"{best_of(lambda: summarize(df, 'User')):>14.1f} "
+            f"{best_of(lambda: summarize(df, ['User', 'Date', 'Payment Mode'])):>14.1f} "
+            f"{best_of(lambda: loop_totals(df)):>12.1f} "
+            f"{best_of(lambda: totals(df)):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""First load of the transaction history in a fresh process, with and without the Arrow snapshot
+
+Storage is a local SQLite file, so "full" measures parsing and normalizing every
+row rather than network time; against Google Sheets the download comes on top.
+"snapshot" memory-maps a copy saved before the last DELTA_ROWS rows were stored
+and reads only those. Each load runs in its own interpreter so resident memory
+is not shared between runs.
+
+Run from the repository root: python -m benchmarks.bench_cold_start [--sizes 100000 1000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.data import sheet_rows, synthetic_transactions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELTA_ROWS = 100
+
+CHILD = """
+import json, sys, time
+from snapshot import TransactionSnapshot
+from storage import SQLiteBackend
+from transaction_store import TransactionStore
+
+def status_mb(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field + ":")) / 1e3
+
+db_path, snapshot_path = sys.argv[1], sys.argv[2] or None
+backend = SQLiteBackend(db_path)
+backend.bootstrap()
+store = TransactionStore(backend, snapshot=TransactionSnapshot(snapshot_path) if snapshot_path else None)
+before = status_mb("VmRSS")
+start = time.perf_counter()
+df = store.get_transactions()
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "rows": len(df), "rss_mb": status_mb("VmRSS") - before,
+                  "peak_mb": status_mb("VmHWM") - before}))
+"""
+
+
+def load(db_path, snapshot_path):
+    result = subprocess.run([sys.executable, "-c", CHILD, db_path, snapshot_path or ""],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def prepare(workdir, n):
+    """SQLite history of n rows plus a snapshot covering all but the last DELTA_ROWS"""
+    from snapshot import TransactionSnapshot
+    from storage import SQLiteBackend
+    from transaction_store import TransactionStore
+
+    db_path = os.path.join(workdir, f"history_{n}.db")
+    snapshot_path = os.path.join(workdir, f"history_{n}.arrow")
+    backend = SQLiteBackend(db_path)
+    backend.bootstrap()
+    rows = sheet_rows(synthetic_transactions(n))
+    backend.append_transactions(rows[:-DELTA_ROWS])
+    snapshot = TransactionSnapshot(snapshot_path)
+    store = TransactionStore(backend)
+    snapshot.save(store.get_transactions(), n - DELTA_ROWS, backend.transaction_headers())
+    backend.append_transactions(rows[-DELTA_ROWS:])
+    return db_path, snapshot_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'load':>9} {'seconds':>9} {'RSS MB':>9} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory(prefix="cold_start_") as workdir:
+        for n in args.sizes:
+            db_path, snapshot_path = prepare(workdir, n)
+            for label, path in (("full", None), ("snapshot", snapshot_path)):
+                result = load(db_path, path)
+                assert result["rows"] == n
+                print(f"{n:>10} {label:>9} {result['seconds']:>9.2f} {result['rss_mb']:>9.1f} {result['peak_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
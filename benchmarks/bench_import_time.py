@@ -0,0 +1,80 @@
+"""Cold-start import cost of app.py's dependencies, checked against a budget
+
+Each sample is a fresh interpreter that imports every module app.py imports at
+the top level (read from its source, so the list never drifts), then the lazily
+loaded statement module. The check fails if the eager imports exceed the budget
+or pull in reportlab, which should only load on the first PDF export.
+
+Run from the repository root: python -m benchmarks.bench_import_time [--budget-ms 1500]
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULE = "statement"
+LAZY_ONLY = ["reportlab"]
+
+PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+eager = time.perf_counter() - start
+leaked = [name for name in {lazy_only!r} if name in sys.modules]
+start = time.perf_counter()
+importlib.import_module({lazy!r})
+print(json.dumps({{"eager": eager, "lazy": time.perf_counter() - start, "leaked": leaked}}))
+"""
+
+
+def top_level_imports(path):
+    """Modules imported at module level of a script, in source order"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def sample(modules):
+    code = PROBE.format(modules=modules, lazy_only=LAZY_ONLY, lazy=LAZY_MODULE)
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="limit for the eager imports (best sample)")
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    modules = top_level_imports(os.path.join(ROOT, "app.py"))
+    samples = [sample(modules) for _ in range(args.samples)]
+    eager = min(s["eager"] for s in samples) * 1000
+    lazy = min(s["lazy"] for s in samples) * 1000
+    leaked = sorted({name for s in samples for name in s["leaked"]})
+
+    print(f"{f'app.py eager imports ({len(modules)} modules)':<36}{eager:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print(f"{f'{LAZY_MODULE} on first PDF export':<36}{lazy:8.1f} ms")
+    failures = []
+    if eager > args.budget_ms:
+        failures.append(f"eager imports took {eager:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if leaked:
+        failures.append(f"eager imports loaded {', '.join(leaked)}, which should wait for {LAZY_MODULE}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
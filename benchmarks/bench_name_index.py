@@ -0,0 +1,53 @@
+"""Payee name suggestions per keystroke: scanning the history versus the NameIndex
+
+"scan" filters every transaction's Name by prefix and ranks the matches by use
+count, as a lookup without an index would. "index" is NameIndex.suggest; its
+one-off build over the history and the cost of adding one new row are shown too.
+
+Run from the repository root: python -m benchmarks.bench_name_index
+"""
+import time
+
+from benchmarks.data import sheet_rows, synthetic_transactions
+from name_index import NameIndex
+from storage import TRANSACTION_HEADERS
+from transaction_store import normalize_transactions
+
+SIZES = [100_000, 500_000]
+DISTINCT_NAMES = 5000
+TYPED = "Vendor 123"
+LIMIT = 10
+
+
+def scan(df, prefix):
+    names = df['Name'].astype(str)
+    matches = names[names.str.casefold().str.startswith(prefix.casefold())]
+    return matches.value_counts().index[:LIMIT].tolist()
+
+
+def best_ms(func, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    print(f"{'rows':>10} {'prefix':>12} {'scan ms':>9} {'index ms':>9}")
+    for n in SIZES:
+        df = normalize_transactions(TRANSACTION_HEADERS, sheet_rows(synthetic_transactions(n, names=DISTINCT_NAMES)))
+        index = NameIndex()
+        build_ms = best_ms(lambda: NameIndex().add(df), repeat=1)
+        index.add(df)
+        for length in range(len(TYPED) + 1):
+            prefix = TYPED[:length]
+            print(f"{n:>10} {prefix!r:>12} {best_ms(scan, df, prefix):>9.2f} "
+                  f"{best_ms(index.suggest, prefix, LIMIT, repeat=100):>9.3f}")
+        print(f"{n:>10} {'build':>12} {'':>9} {build_ms:>9.1f}")
+        print(f"{n:>10} {'add 1 row':>12} {'':>9} {best_ms(index.add, df.iloc[-1:]):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Date-range queries on the cached history: boolean masks versus the sorted TimeIndex
+
+"mask" replays the previous path: compare every row's Date (and User) against
+the range. "index" is TransactionStore's path: binary search over the sorted
+Date column, or a slice of the user's position array. Also times indexing a
+small in-order append against re-sorting the whole frame.
+
+Run from the repository root: python -m benchmarks.bench_range_index
+"""
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from benchmarks.data import sheet_rows, synthetic_transactions
+from storage import TRANSACTION_HEADERS
+from transaction_store import TimeIndex, merge_transactions, normalize_transactions
+
+SIZES = [100_000, 1_000_000]
+APPEND_ROWS = 10
+
+
+def mask(df, user, start_date, end_date):
+    if user is not None:
+        df = df[df['User'] == user]
+    return df[(df['Date'] >= pd.Timestamp(start_date)) & (df['Date'] <= pd.Timestamp(end_date))]
+
+
+def best_ms(func, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    print(f"{'rows':>10} {'query':>16} {'mask ms':>9} {'index ms':>9} {'rows out':>9}")
+    for n in SIZES:
+        df = normalize_transactions(TRANSACTION_HEADERS, sheet_rows(synthetic_transactions(n)))
+        df = df.sort_values('Timestamp', kind='stable', ignore_index=True)
+        index = TimeIndex(df)
+        end_date = df['Timestamp'].iloc[-1].date()
+        for label, user, days in (("all, 1 day", None, 0), ("all, 30 days", None, 30),
+                                  ("user, 30 days", "user0", 30), ("user, 365 days", "user0", 365)):
+            start_date = end_date - timedelta(days=days)
+            rows = len(index.select(df, user, start_date, end_date))
+            assert rows == len(mask(df, user, start_date, end_date))
+            print(f"{n:>10} {label:>16} {best_ms(mask, df, user, start_date, end_date):>9.2f} "
+                  f"{best_ms(index.select, df, user, start_date, end_date):>9.2f} {rows:>9}")
+
+        new_df = normalize_transactions(TRANSACTION_HEADERS, sheet_rows(synthetic_transactions(APPEND_ROWS, seed=1)))
+        new_df['Timestamp'] += pd.Timedelta(days=1)
+        new_df['Date'] = new_df['Timestamp'].dt.normalize()
+        new_df = new_df.sort_values('Timestamp', kind='stable', ignore_index=True)
+
+        def resort():
+            pd.concat([df, new_df], ignore_index=True).sort_values('Timestamp', kind='stable')
+
+        def append():
+            # Repeats extend the same index again; it is not queried afterwards
+            merge_transactions(df, new_df)
+            index.extend(new_df, len(df))
+
+        print(f"{n:>10} {f'append {APPEND_ROWS} rows':>16} {best_ms(resort):>9.2f} {best_ms(append):>9.2f} {'':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Latency and peak memory of the logged-in render path, before and after frame normalization
+
+"before" replays the previous path: the cache hands out a copy, the admin view copies
+again, and the statement tab reparses Timestamp into a Date column on every rerun.
+"after" shares the normalized frame and slices its precomputed Date column.
+
+Run from the repository root: python -m benchmarks.bench_render_path
+"""
+import time
+import tracemalloc
+from datetime import timedelta
+
+import pandas as pd
+
+from aggregations import totals
+from benchmarks.data import synthetic_transactions
+from transaction_store import normalize_transactions, slice_date_range
+
+SIZES = [100_000, 1_000_000]
+
+
+def before(cached_df, start_date, end_date):
+    df = cached_df.copy()
+    user_df = df.copy()
+    user_df['Date'] = pd.to_datetime(user_df['Timestamp']).dt.date
+    filtered_df = user_df[(user_df['Date'] >= start_date) & (user_df['Date'] <= end_date)]
+    return totals(filtered_df)
+
+
+def after(cached_df, start_date, end_date):
+    return totals(slice_date_range(cached_df, start_date, end_date))
+
+
+def measure(func, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings) * 1000, peak / 1e6
+
+
+def main():
+    print(f"{'rows':>10} {'path':>7} {'ms':>9} {'peak MB':>9} {'frame MB':>9}")
+    for n in SIZES:
+        raw = synthetic_transactions(n)
+        raw['Timestamp'] = raw['Timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")
+        normalized = normalize_transactions(list(raw.columns), raw.values.tolist())
+        legacy = normalized.drop(columns=['Date']).astype({'User': str, 'Type': str, 'Payment Mode': str})
+        end_date = normalized['Timestamp'].max().date()
+        start_date = end_date - timedelta(days=30)
+        for label, func, frame in (("before", before, legacy), ("after", after, normalized)):
+            ms, peak = measure(func, frame, start_date, end_date)
+            frame_mb = frame.memory_usage(deep=True).sum() / 1e6
+            print(f"{n:>10} {label:>7} {ms:>9.1f} {peak:>9.1f} {frame_mb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from storage import TRANSACTION_HEADERS
+
+TYPES = ["Paid", "Received"]
+PAYMENT_MODES = ["Online", "GPay", "PhonePe", "Cash"]
+
+
+def synthetic_transactions(n, users=12, names=500, days=365, seed=0):
+    """Random transactions shaped like the sheet, spread over the last `days` days"""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().floor("s")
+    offsets = np.sort(rng.integers(0, days * 86400, size=n))[::-1]
+    return pd.DataFrame({
+        "Timestamp": end - pd.to_timedelta(offsets, unit="s"),
+        "User": np.array([f"user{i}" for i in range(users)])[rng.integers(0, users, size=n)],
+        "Name": np.array([f"Vendor {i}" for i in range(names)])[rng.integers(0, names, size=n)],
+        "Description": "",
+        "Amount": rng.integers(10, 50_000, size=n).astype(float),
+        "Type": np.array(TYPES)[rng.integers(0, len(TYPES), size=n)],
+        "Payment Mode": np.array(PAYMENT_MODES)[rng.integers(0, len(PAYMENT_MODES), size=n)],
+    }, columns=TRANSACTION_HEADERS)
+
+
+def sheet_rows(df):
+    """Transactions as the all-text rows Google Sheets returns"""
+    df = df.assign(Timestamp=df['Timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S"), Amount=df['Amount'].map("{:g}".format))
+    return df.astype(str).values.tolist()
@@ -0,0 +1,237 @@
+"""In-memory stand-in for the parts of gspread the app uses
+
+Every method that would be a Sheets API request is counted in FakeSpreadsheet.calls
+and can be slowed by `latency` seconds to approximate a network round trip.
+"""
+import csv
+import io
+import itertools
+import re
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import gspread
+
+
+def _numericise(value):
+    # get_all_records returns numbers for numeric-looking cells, like gspread does
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _column_index(letter):
+    return ord(letter) - ord('A')
+
+
+def _padded(rows):
+    # gspread pads every row to the widest one, and an empty range reads as [[]]
+    if not rows:
+        return [[]]
+    width = max(len(row) for row in rows)
+    return [list(row) + [""] * (width - len(row)) for row in rows]
+
+
+class FakeResponse:
+    def __init__(self, text, error=None):
+        self.text = text
+        self.error = error
+
+    def json(self):
+        return {"error": self.error}
+
+
+class FakeWorksheet:
+    """Worksheet handle that, like gspread's, keeps the title it was fetched with
+
+    Handles to one worksheet share its rows. Requests that address the sheet by
+    title fail once another handle has renamed it.
+    """
+
+    def __init__(self, spreadsheet, title, sheet_id, sheet=None):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self._sheet = sheet or self
+        if sheet is None:
+            self._values = []
+            self._hidden = False
+
+    @property
+    def values(self):
+        return self._sheet._values
+
+    @values.setter
+    def values(self, values):
+        self._sheet._values = values
+
+    @property
+    def hidden(self):
+        return self._sheet._hidden
+
+    def _handle(self):
+        return FakeWorksheet(self.spreadsheet, self._sheet.title, self.id, self._sheet)
+
+    def _request(self, method, by_title=True):
+        self.spreadsheet._request(method)
+        if by_title and self.title != self._sheet.title:
+            message = f"Unable to parse range: '{self.title}'"
+            raise gspread.exceptions.APIError(FakeResponse(message, {"code": 400, "message": message, "status": "INVALID_ARGUMENT"}))
+
+    def row_values(self, row):
+        self._request("row_values")
+        return list(self.values[row - 1]) if row <= len(self.values) else []
+
+    def get_all_values(self):
+        self._request("get_all_values")
+        return _padded(self.values)
+
+    def get_values(self, range_name):
+        self._request("get_values")
+        return _padded(self._range(range_name))
+
+    def _range(self, range_name):
+        match = re.fullmatch(r"([A-Z])(\d+):([A-Z])(\d*)", range_name)
+        first, last = int(match.group(2)), match.group(4)
+        width = _column_index(match.group(3)) + 1
+        rows = self.values[first - 1:int(last) if last else None]
+        return [row[:width] for row in rows]
+
+    def get_all_records(self):
+        self._request("get_all_records")
+        if not self.values:
+            return []
+        headers = self.values[0]
+        return [dict(zip(headers, map(_numericise, row))) for row in self.values[1:]]
+
+    def append_row(self, values, **kwargs):
+        self._request("append_row")
+        self.values.append([str(value) for value in values])
+
+    def append_rows(self, values, **kwargs):
+        self._request("append_rows")
+        self.values.extend([str(value) for value in row] for row in values)
+
+    def find(self, query, in_column=None, **kwargs):
+        self._request("find")
+        for row_number, row in enumerate(self.values, start=1):
+            cells = row if in_column is None else row[in_column - 1:in_column]
+            if query in cells:
+                return SimpleNamespace(row=row_number, col=in_column or row.index(query) + 1, value=query)
+        return None
+
+    def update_cell(self, row, col, value):
+        self._request("update_cell")
+        cells = self.values[row - 1]
+        cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = str(value)
+
+    def update_title(self, title):
+        self._request("update_title", by_title=False)
+        self.title = self._sheet.title = title
+
+    def hide(self):
+        self._request("hide", by_title=False)
+        self._sheet._hidden = True
+
+
+class FakeSpreadsheet:
+    """Spreadsheet whose first worksheet is sheet1, like a freshly created one"""
+
+    def __init__(self, latency=0.0):
+        self.id = "fake-spreadsheet"
+        self.latency = latency
+        self.calls = Counter()
+        self.client = FakeClient(self)
+        self._ids = itertools.count()
+        # The worksheets themselves, whose titles are current; callers get handles
+        self._worksheets = [FakeWorksheet(self, "Sheet1", next(self._ids))]
+
+    def _request(self, method):
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def sheet1(self):
+        self._request("sheet1")
+        return self._worksheets[0]._handle()
+
+    def worksheets(self):
+        self._request("worksheets")
+        return [sheet._handle() for sheet in self._worksheets]
+
+    def worksheet(self, title):
+        self._request("worksheet")
+        for sheet in self._worksheets:
+            if sheet.title == title:
+                return sheet._handle()
+        raise gspread.WorksheetNotFound(title)
+
+    def values_batch_get(self, ranges, params=None):
+        """Answer "'title'!A2:G" ranges in one request; like the API, an empty range has no values key"""
+        self._request("values_batch_get")
+        value_ranges = []
+        for range_name in ranges:
+            title, cells = range_name.rsplit("!", 1)
+            title = title[1:-1].replace("''", "'") if title.startswith("'") else title
+            sheets = [sheet for sheet in self._worksheets if sheet.title == title]
+            if not sheets:
+                raise ValueError(f"Unable to parse range: {range_name}")
+            values = sheets[0]._range(cells)
+            value_ranges.append({"range": range_name, "values": values} if values else {"range": range_name})
+        return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+    def add_worksheet(self, title, rows, cols, **kwargs):
+        self._request("add_worksheet")
+        if any(sheet.title == title for sheet in self._worksheets):
+            message = f'Invalid requests[0].addSheet: A sheet with the name "{title}" already exists.'
+            raise gspread.exceptions.APIError(FakeResponse(message, {"code": 400, "message": message, "status": "INVALID_ARGUMENT"}))
+        sheet = FakeWorksheet(self, title, next(self._ids))
+        self._worksheets.append(sheet)
+        return sheet._handle()
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+
+class FakeClient:
+    """gspread client that opens one FakeSpreadsheet and answers gviz CSV queries"""
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def open_by_key(self, key):
+        return self.spreadsheet
+
+    def request(self, method, url, params=None, **kwargs):
+        # Only the "select * where B = 'user' and A >= '...' and A < '...'" queries
+        # that SheetsBackend issues are understood
+        self.spreadsheet._request("gviz")
+        sheet = next(sheet for sheet in self.spreadsheet._worksheets if sheet.id == params["gid"])
+        conditions = re.findall(r"([A-Z]) (=|>=|<) ['\"](.*?)['\"](?: and |$)", params["tq"])
+        rows = [row for row in sheet.values[1:] if all(
+            self._matches(row[_column_index(column)], op, value) for column, op, value in conditions
+        )]
+        out = io.StringIO()
+        csv.writer(out).writerows([sheet.values[0]] + rows)
+        return FakeResponse(out.getvalue())
+
+    @staticmethod
+    def _matches(cell, op, value):
+        if op == "=":
+            return cell == value
+        if op == ">=":
+            return cell >= value
+        return cell < value
+
+
+def open_fake_spreadsheet(rows, headers, latency=0.0):
+    """FakeSpreadsheet whose sheet1 holds a header row followed by `rows`"""
+    spreadsheet = FakeSpreadsheet(latency)
+    spreadsheet._worksheets[0].values = [list(headers)] + rows
+    return spreadsheet
@@ -0,0 +1,179 @@
+"""End-to-end load test of app.py against an in-memory fake of Google Sheets
+
+Each scenario drives the real script through Streamlit's AppTest and times the
+rerun triggered by one user action, counting the Sheets API requests made while
+it runs (for submit, also those the background writer makes to flush the new
+rows). Logging in the sessions a scenario reuses is not timed or counted.
+Cached resources are shared across sessions as on a real server and cleared
+between dataset sizes.
+
+Run from the repository root (Streamlit logs to stderr):
+    python -m benchmarks.load_test [--sizes 1000 100000] [--iterations 20] 2>/dev/null
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from auth import hash_password
+from benchmarks.data import sheet_rows, synthetic_transactions
+from benchmarks.fake_sheets import open_fake_spreadsheet
+from storage import CREDENTIAL_HEADERS, DEFAULT_ADMIN, TRANSACTION_HEADERS, default_admin_row
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+USERS = 12
+PASSWORD = "benchmark"
+SUBMIT_BUTTON = "FormSubmitter:entry_form-Submit Transaction"
+
+
+class LoadTest:
+    def __init__(self, size, iterations, latency, partitioned, pdf_days):
+        self.iterations = iterations
+        self.pdf_days = pdf_days
+        self.partitioned = partitioned
+        self.workdir = tempfile.mkdtemp(prefix="load_test_")
+        rows = sheet_rows(synthetic_transactions(size, users=USERS))
+        self.spreadsheet = open_fake_spreadsheet(rows, TRANSACTION_HEADERS, latency)
+        password_hash = hash_password(PASSWORD)
+        credentials = self.spreadsheet.add_worksheet("credentials", rows=1000, cols=len(CREDENTIAL_HEADERS))
+        credentials.values = [CREDENTIAL_HEADERS, default_admin_row()] + [
+            [f"user{i}", password_hash, "0000000000", f"User {i}", "user"] for i in range(USERS)
+        ]
+        self.spreadsheet.calls.clear()
+
+    def session(self):
+        at = AppTest.from_file(APP_PATH, default_timeout=600)
+        at.secrets["gcp_service_account"] = {"type": "service_account"}
+        at.secrets["write_queue_path"] = os.path.join(self.workdir, "pending_writes.db")
+        at.secrets["partition_transactions"] = self.partitioned
+        return at
+
+    def login(self, at, username, password):
+        at.run()
+        at.text_input(key="login_username").input(username)
+        at.text_input(key="login_password").input(password)
+        at.button(key="login_btn").click()
+
+    def logged_in(self, username, password=PASSWORD):
+        at = self.session()
+        self.login(at, username, password)
+        self.run(at)
+        return at
+
+    def run(self, at):
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    def measure(self, name, prepare, wait=None):
+        """Time `iterations` reruns, each set up by prepare(i) -> AppTest"""
+        timings = []
+        calls = 0
+        for i in range(self.iterations):
+            at = prepare(i)
+            calls_before = self.spreadsheet.total_calls()
+            start = time.perf_counter()
+            self.run(at)
+            timings.append(time.perf_counter() - start)
+            calls += self.spreadsheet.total_calls() - calls_before
+        if wait:
+            calls_before = self.spreadsheet.total_calls()
+            wait()
+            calls += self.spreadsheet.total_calls() - calls_before
+        return name, timings, calls / self.iterations
+
+    def scenarios(self):
+        sessions = {}
+
+        def user_session(i):
+            username = f"user{i % USERS}"
+            if username not in sessions:
+                sessions[username] = self.logged_in(username)
+            return sessions[username]
+
+        def login(i):
+            at = self.session()
+            self.login(at, f"user{i % USERS}", PASSWORD)
+            return at
+
+        def today_summary(i):
+            return user_session(i)
+
+        def submit(i):
+            at = user_session(i)
+            # Pick a known payee: AppTest cannot type a new option into the Name selectbox
+            names = at.selectbox(key="name_field")
+            names.set_value(names.options[i % len(names.options)])
+            at.number_input(key="amount_field").set_value(100.0)
+            at.radio(key="type_field").set_value("Paid")
+            at.radio(key="mode_field").set_value("Cash")
+            at.button(key=SUBMIT_BUTTON).click()
+            return at
+
+        def row_count():
+            return sum(len(sheet.values) for sheet in self.spreadsheet._worksheets)
+
+        def flushed():
+            # Wait for the background writer to append every submitted row
+            deadline = time.monotonic() + 60
+            while time.monotonic() < deadline:
+                if row_count() >= written + self.iterations:
+                    return
+                time.sleep(0.05)
+            raise RuntimeError("write queue did not flush")
+
+        def user_summary(i):
+            if "admin" not in sessions:
+                sessions["admin"] = self.logged_in(DEFAULT_ADMIN[0], DEFAULT_ADMIN[1])
+            admin = sessions["admin"]
+            today = datetime.now().date()
+            admin.date_input(key="admin_start_date").set_value(today - timedelta(days=30 + i))
+            return admin
+
+        def pdf_export(i):
+            # A different range every time, so the statement cache never answers
+            at = user_session(0)
+            today = datetime.now().date()
+            at.date_input(key="start_date").set_value(today - timedelta(days=self.pdf_days + i))
+            at.date_input(key="end_date").set_value(today - timedelta(days=i))
+            self.run(at)
+            at.button(key="prepare_pdf_btn").click()
+            return at
+
+        yield self.measure("login", login)
+        yield self.measure("today_summary", today_summary)
+        written = row_count()
+        yield self.measure("submit", submit, wait=flushed)
+        yield self.measure("user_summary", user_summary)
+        yield self.measure("pdf_export", pdf_export)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every fake API request")
+    parser.add_argument("--pdf-days", type=int, default=30, help="days covered by each exported statement")
+    parser.add_argument("--partitioned", action="store_true", help="use monthly partitioned worksheets")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'scenario':>14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'API/op':>7}")
+    for size in args.sizes:
+        st.cache_resource.clear()
+        test = LoadTest(size, args.iterations, args.latency_ms / 1000, args.partitioned, args.pdf_days)
+        with mock.patch("google.oauth2.service_account.Credentials.from_service_account_info"), \
+                mock.patch("gspread.authorize", return_value=test.spreadsheet.client):
+            for name, timings, calls in test.scenarios():
+                p50, p95, p99 = np.percentile(np.array(timings) * 1000, [50, 95, 99])
+                print(f"{size:>10} {name:>14} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} "
+                      f"{max(timings) * 1000:>9.1f} {calls:>7.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
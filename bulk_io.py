@@ -0,0 +1,169 @@
+import io
+import time
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from storage import HEADER_ALIASES, PAYMENT_MODES, TRANSACTION_HEADERS, TRANSACTION_TYPES
+
+IMPORT_CHUNK_ROWS = 5000
+EXPORT_CHUNK_ROWS = 50_000
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+REQUIRED_COLUMNS = [col for col in TRANSACTION_HEADERS if col != "Description"]
+
+_TYPES = {value.lower(): value for value in TRANSACTION_TYPES}
+_MODES = {value.lower(): value for value in PAYMENT_MODES}
+
+
+class BulkImportError(Exception):
+    """Import stopped partway; `written` rows were already stored"""
+
+    def __init__(self, message, written):
+        super().__init__(message)
+        self.written = written
+
+
+def read_chunks(file, filename, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Yield an uploaded CSV or Excel file as DataFrames of up to chunk_rows rows"""
+    file.seek(0)
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        yield from _read_excel_chunks(file, chunk_rows)
+    else:
+        yield from pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+def _read_excel_chunks(file, chunk_rows):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Excel import needs the openpyxl package") from None
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = ["" if cell is None else str(cell) for cell in next(rows, ())]
+        while chunk := list(islice(rows, chunk_rows)):
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def validate_chunk(chunk, first_line):
+    """Sheet-ready rows for the valid lines of a chunk, plus (line, message) for the rest"""
+    chunk = chunk.rename(columns=lambda col: HEADER_ALIASES.get(str(col).strip(), str(col).strip()))
+    missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    def text(col):
+        if col not in chunk.columns:
+            return pd.Series("", index=chunk.index)
+        return chunk[col].fillna("").astype(str).str.strip()
+
+    timestamps = pd.to_datetime(chunk['Timestamp'], errors='coerce', format='mixed')
+    users, names = text('User'), text('Name')
+    amounts = pd.to_numeric(text('Amount').str.replace(",", ""), errors='coerce')
+    types = text('Type').str.lower().map(_TYPES)
+    modes = text('Payment Mode').str.lower().map(_MODES)
+    checks = [
+        (timestamps.isna(), "Timestamp is not a valid date"),
+        (users == "", "User is empty"),
+        (names == "", "Name is empty"),
+        (~(amounts > 0), "Amount must be a positive number"),
+        (types.isna(), f"Type must be one of {', '.join(TRANSACTION_TYPES)}"),
+        (modes.isna(), f"Payment Mode must be one of {', '.join(PAYMENT_MODES)}"),
+    ]
+    # Report only the first problem on each line
+    bad = np.zeros(len(chunk), dtype=bool)
+    errors = []
+    for mask, message in checks:
+        mask = mask.to_numpy() & ~bad
+        errors.extend((first_line + int(position), message) for position in np.flatnonzero(mask))
+        bad |= mask
+    valid = ~bad
+    rows = pd.DataFrame({
+        "Timestamp": timestamps[valid].dt.strftime(TIMESTAMP_FORMAT),
+        "User": users[valid],
+        "Name": names[valid],
+        "Description": text('Description')[valid],
+        "Amount": amounts[valid].astype(float),
+        "Type": types[valid],
+        "Payment Mode": modes[valid],
+    }, columns=TRANSACTION_HEADERS)
+    return rows.values.tolist(), sorted(errors)
+
+
+def _validated_chunks(file, filename, chunk_rows):
+    first_line = 2  # line 1 is the header
+    for chunk in read_chunks(file, filename, chunk_rows):
+        rows, errors = validate_chunk(chunk, first_line)
+        first_line += len(chunk)
+        yield rows, errors
+
+
+def validate_file(file, filename, chunk_rows=IMPORT_CHUNK_ROWS, max_errors=100):
+    """Stream through an upload without storing anything; returns (valid rows, first errors, error count)"""
+    valid, errors, error_count = 0, [], 0
+    for rows, chunk_errors in _validated_chunks(file, filename, chunk_rows):
+        valid += len(rows)
+        error_count += len(chunk_errors)
+        errors.extend(chunk_errors[:max_errors - len(errors)])
+    return valid, errors, error_count
+
+
+def import_file(backend, file, filename, chunk_rows=IMPORT_CHUNK_ROWS, min_interval=1.0, retries=3,
+                on_progress=None):
+    """Append the valid rows of an upload with one append request per chunk
+
+    Requests are spaced at least min_interval seconds apart to stay inside the
+    Sheets write quota, and a failed request is retried with backoff before the
+    import gives up with BulkImportError.
+    """
+    written = 0
+    last_request = 0.0
+    for rows, _ in _validated_chunks(file, filename, chunk_rows):
+        if not rows:
+            continue
+        for attempt in range(retries + 1):
+            time.sleep(max(0.0, min_interval * 2 ** attempt - (time.monotonic() - last_request)))
+            last_request = time.monotonic()
+            try:
+                backend.append_transactions(rows)
+                break
+            except Exception as e:
+                if attempt == retries:
+                    raise BulkImportError(f"Import stopped after {written} rows: {e}", written) from e
+        written += len(rows)
+        if on_progress:
+            on_progress(written)
+    return written
+
+
+def _export_chunks(df, chunk_rows):
+    order = df['Timestamp'].to_numpy().argsort(kind='stable')
+    for start in range(0, len(order), chunk_rows):
+        yield df.iloc[order[start:start + chunk_rows]][TRANSACTION_HEADERS]
+
+
+def export_csv(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Transactions oldest first as CSV bytes, encoded one chunk at a time"""
+    buffer = io.BytesIO()
+    buffer.write((",".join(TRANSACTION_HEADERS) + "\n").encode())
+    for chunk in _export_chunks(df, chunk_rows):
+        buffer.write(chunk.to_csv(index=False, header=False, date_format=TIMESTAMP_FORMAT).encode())
+    return buffer.getvalue()
+
+
+def export_parquet(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Transactions oldest first as Parquet bytes, one row group per chunk"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs the pyarrow package") from None
+    buffer = io.BytesIO()
+    schema = pa.Schema.from_pandas(df[TRANSACTION_HEADERS].head(0), preserve_index=False)
+    with pq.ParquetWriter(buffer, schema) as writer:
+        for chunk in _export_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return buffer.getvalue()
@@ -0,0 +1,61 @@
+import collections
+import logging
+import threading
+
+logger = logging.getLogger("tracker.feed")
+
+
+class ChangeFeed:
+    """One background poller per process that loads newly stored rows into the shared store
+
+    Sessions never poll storage themselves: they re-read the in-memory store on
+    a timer and ask new_rows_since() what arrived since they last looked, so the
+    storage request rate is one per interval however many sessions are open.
+    The first poll loads the full history and is not reported as new rows.
+    Failed polls back off exponentially up to max_interval.
+    """
+
+    def __init__(self, store, interval=15, max_interval=300, keep=100):
+        self.store = store
+        self.interval = interval
+        self.max_interval = max_interval
+        self.version = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._changes = collections.deque(maxlen=keep)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+
+    def new_rows_since(self, version):
+        """(current version, rows loaded by polls after `version`); None as version counts nothing"""
+        with self._lock:
+            if version is None:
+                return self.version, 0
+            return self.version, sum(rows for v, rows in self._changes if v > version)
+
+    def stop(self, timeout=5):
+        """Stop polling after the current request"""
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        failures = 0
+        loaded = False
+        while not self._stopped.is_set():
+            rows = 0
+            try:
+                rows = self.store.poll()
+                if not loaded:
+                    rows, loaded = 0, True
+                self.last_error = None
+                failures = 0
+            except Exception as e:
+                logger.warning("Polling for new transactions failed: %s", e)
+                self.last_error = str(e)
+                failures += 1
+            if rows:
+                with self._lock:
+                    self.version += 1
+                    self._changes.append((self.version, rows))
+            self._stopped.wait(min(self.max_interval, self.interval * 2 ** failures))
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+
+class Coordinator:
+    """Coordination between app processes on one host through a shared SQLite file
+
+    Provides generation counters for cross-process cache invalidation, atomic
+    username reservation, a file lock that lets one process append at a time,
+    and named locks for work that only one process should be doing at once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._named_locks = {}
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS generations (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS usernames (username TEXT PRIMARY KEY COLLATE NOCASE)")
+
+    def generation(self, name):
+        """Current value of a counter that bump() increments; 0 if never bumped"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM generations WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, name):
+        """Increment a counter so other processes see their cached copy is stale; returns the new value"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO generations (name, value) VALUES (?, 1) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+                )
+                value = self._conn.execute("SELECT value FROM generations WHERE name = ?", (name,)).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def reserve_username(self, username):
+        """Claim a username for this process; False if any process already holds it"""
+        with self._lock:
+            cursor = self._conn.execute("INSERT OR IGNORE INTO usernames (username) VALUES (?)", (username,))
+        return cursor.rowcount == 1
+
+    def reserve_usernames(self, usernames):
+        """Record usernames that already exist so they can never be reserved again"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR IGNORE INTO usernames (username) VALUES (?)", [(u,) for u in usernames])
+            self._conn.execute("COMMIT")
+
+    def release_username(self, username):
+        """Give back a reservation whose account could not be stored"""
+        with self._lock:
+            self._conn.execute("DELETE FROM usernames WHERE username = ?", (username,))
+
+    @contextmanager
+    def write_lock(self):
+        """Hold the host-wide writer lock (and this process's) for the duration of the block"""
+        with self._write_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def try_lock(self, name):
+        """Hold a host-wide lock named `name` if no process has it; yields whether it was taken"""
+        with self._lock:
+            local = self._named_locks.setdefault(name, threading.Lock())
+        if not local.acquire(blocking=False):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+            with open(f"{self.path}.{name}.lock", "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            local.release()
+
+
+class LockedBackend:
+    """StorageBackend proxy whose appends run one at a time across all processes"""
+
+    def __init__(self, backend, coordinator):
+        self.backend = backend
+        self.coordinator = coordinator
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def append_transaction(self, row):
+        self.append_transactions([row])
+
+    def append_transactions(self, rows):
+        with self.coordinator.write_lock():
+            self.backend.append_transactions(rows)
+
+    def append_credential(self, row):
+        with self.coordinator.write_lock():
+            self.backend.append_credential(row)
+
+    def update_password(self, username, password_hash):
+        with self.coordinator.write_lock():
+            self.backend.update_password(username, password_hash)
+
@@ -0,0 +1,175 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+logger = logging.getLogger("tracker.metrics")
+
+STAT_FIELDS = ["calls", "seconds", "rows"]
+
+
+def merge_stats(target, stats):
+    """Add {section: {calls, seconds, rows}} counts into target in place"""
+    for name, values in stats.items():
+        totals = target.setdefault(name, dict.fromkeys(STAT_FIELDS, 0))
+        for field in STAT_FIELDS:
+            totals[field] += values[field]
+    return target
+
+
+def stats_frame(stats):
+    """Section stats as a table sorted by total time"""
+    rows = [(name, v["calls"], v["seconds"] * 1000, v["rows"]) for name, v in stats.items()]
+    df = pd.DataFrame(rows, columns=["Section", "Calls", "Total ms", "Rows"])
+    return df.sort_values("Total ms", ascending=False, ignore_index=True)
+
+
+class _Section:
+    rows = 0
+
+
+class Metrics:
+    """Process-wide call counts, wall time and rows per section, with a per-rerun breakdown
+
+    A rerun is whatever one script thread records between start_rerun() and
+    end_rerun(); work on background threads only counts towards process totals.
+    When disabled, timed() returns functions unwrapped and nothing is recorded.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._local = threading.local()
+
+    def record(self, name, seconds, rows=0):
+        stats = {name: {"calls": 1, "seconds": seconds, "rows": rows}}
+        with self._lock:
+            merge_stats(self._totals, stats)
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is not None:
+            merge_stats(rerun, stats)
+
+    @contextmanager
+    def section(self, name):
+        """Time a block; set `.rows` on the yielded object to record rows processed"""
+        section = _Section()
+        start = time.perf_counter()
+        try:
+            yield section
+        finally:
+            self.record(name, time.perf_counter() - start, section.rows)
+
+    def timed(self, name, rows=None):
+        """Decorator recording each call; rows(result) gives the rows processed"""
+        def decorate(func):
+            if not self.enabled:
+                return func
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result = func(*args, **kwargs)
+                self.record(name, time.perf_counter() - start, rows(result) if rows else 0)
+                return result
+            return wrapper
+        return decorate
+
+    def count_requests(self, client):
+        """Count every HTTP request a gspread client makes as a 'sheets_api' section"""
+        request = client.request
+
+        def counted(*args, **kwargs):
+            with self.section("sheets_api"):
+                return request(*args, **kwargs)
+        client.request = counted
+
+    def start_rerun(self):
+        if self.enabled:
+            self._local.rerun = {}
+            self._local.started = time.perf_counter()
+
+    def end_rerun(self, **context):
+        """Finish the current rerun, log it as one JSON line and return its section stats"""
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is None:
+            return None
+        self._local.rerun = None
+        seconds = time.perf_counter() - self._local.started
+        self.record("rerun", seconds)
+        rerun["rerun"] = {"calls": 1, "seconds": seconds, "rows": 0}
+        logger.info(json.dumps({"event": "rerun", **context, "sections": rerun}, default=str))
+        return rerun
+
+    def totals(self):
+        with self._lock:
+            return {name: dict(values) for name, values in self._totals.items()}
+
+    def prometheus(self):
+        """Process totals in the Prometheus text exposition format"""
+        totals = self.totals()
+        lines = []
+        for field, help_text in (("calls", "Calls per instrumented section"),
+                                 ("seconds", "Wall time spent per instrumented section"),
+                                 ("rows", "Rows processed per instrumented section")):
+            metric = f"tracker_section_{field}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name in sorted(totals):
+                lines.append(f'{metric}{{section="{name}"}} {totals[name][field]}')
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedBackend:
+    """StorageBackend proxy that records every storage call as a 'storage.<method>' section"""
+
+    def __init__(self, backend, metrics):
+        self.backend = backend
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def bootstrap(self):
+        with self.metrics.section("storage.bootstrap"):
+            self.backend.bootstrap()
+
+    def read_transactions(self, position=None):
+        with self.metrics.section("storage.read_transactions") as section:
+            rows, position = self.backend.read_transactions(position)
+            section.rows = len(rows)
+        return rows, position
+
+    def query_transactions(self, user=None, start_date=None, end_date=None):
+        with self.metrics.section("storage.query_transactions") as section:
+            rows = self.backend.query_transactions(user, start_date, end_date)
+            section.rows = len(rows)
+        return rows
+
+    def append_transaction(self, row):
+        self.append_transactions([row])
+
+    def append_transactions(self, rows):
+        with self.metrics.section("storage.append_transactions") as section:
+            self.backend.append_transactions(rows)
+            section.rows = len(rows)
+
+    def read_credentials(self):
+        with self.metrics.section("storage.read_credentials") as section:
+            records = self.backend.read_credentials()
+            section.rows = len(records)
+        return records
+
+    def append_credential(self, row):
+        with self.metrics.section("storage.append_credential") as section:
+            self.backend.append_credential(row)
+            section.rows = 1
+
+    def update_password(self, username, password_hash):
+        with self.metrics.section("storage.update_password") as section:
+            self.backend.update_password(username, password_hash)
+            section.rows = 1
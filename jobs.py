@@ -0,0 +1,104 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """One background report: its parameters, progress and finished artifact"""
+
+    def __init__(self, job_id, key, label, filename, mime):
+        self.id = job_id
+        self.key = key
+        self.label = label
+        self.filename = filename
+        self.mime = mime
+        self.status = QUEUED
+        self.progress = 0.0
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def set_progress(self, fraction):
+        self.progress = min(1.0, max(0.0, fraction))
+
+
+class JobRunner:
+    """Small worker pool for slow reports, deduplicated on their parameters
+
+    Workers are threads, so a running job shares the interpreter with the
+    script threads; keep max_workers low so interactive reruns keep most of it.
+    Finished artifacts stay in memory until keep_finished newer jobs complete.
+    """
+
+    def __init__(self, max_workers=1, keep_finished=20):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._by_key = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, key, label, filename, mime, func, *args):
+        """Queue func(*args, progress=callback) -> bytes, or return the job already queued for key
+
+        A failed job is replaced, so resubmitting retries it.
+        """
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is not None and job.status != FAILED:
+                return job
+            job = Job(next(self._ids), key, label, filename, mime)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+        self._executor.submit(self._run, job, func, args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key):
+        """Job queued, running or done for key, if any"""
+        with self._lock:
+            return self._by_key.get(key)
+
+    def jobs(self):
+        """All retained jobs, newest first"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.id, reverse=True)
+
+    def active(self):
+        with self._lock:
+            return any(not job.finished for job in self._jobs.values())
+
+    def _run(self, job, func, args):
+        job.status = RUNNING
+        try:
+            job.result = func(*args, progress=job.set_progress)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        job.finished_at = time.time()
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.finished]
+            finished.sort(key=lambda job: job.finished_at)
+            for job in finished[:max(0, len(finished) - self.keep_finished)]:
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
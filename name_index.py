@@ -0,0 +1,114 @@
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+HALF_LIFE_DAYS = 30
+# Weights are 2 ** (days since this epoch / half-life): a use HALF_LIFE_DAYS ago
+# counts half as much as one today, and floats stay finite for decades
+_EPOCH = pd.Timestamp("2020-01-01")
+
+
+def name_key(name):
+    """Case- and whitespace-insensitive form under which spellings of a name are merged"""
+    return " ".join(str(name).split()).casefold()
+
+
+class NameIndex:
+    """Payee names ranked by recency-weighted frequency, searchable by prefix
+
+    Keys are kept in a sorted list with their summed recency weights in a
+    parallel array, so a prefix is a bisect range and its best names one
+    argpartition over that slice. Each key also counts its uses per spelling so
+    the most used spelling is the one shown. Expects normalized transactions
+    (see transaction_store.normalize_transactions) and supports taking rows back
+    out, like DailyRollup.
+    """
+
+    def __init__(self, half_life_days=HALF_LIFE_DAYS):
+        self.half_life_days = half_life_days
+        self._keys = []
+        self._scores = np.zeros(0)
+        self._spellings = {}
+
+    def _weights(self, timestamps):
+        days = (timestamps - _EPOCH) / pd.Timedelta(days=1)
+        return np.exp2(days.to_numpy(dtype=float) / self.half_life_days)
+
+    def _by_spelling(self, df):
+        frame = pd.DataFrame({"name": df['Name'].astype(str).to_numpy(), "weight": self._weights(df['Timestamp'])})
+        grouped = frame.groupby("name", sort=False)["weight"].agg(["size", "sum"])
+        for name, count, weight in zip(grouped.index, grouped["size"], grouped["sum"]):
+            key = name_key(name)
+            if key:
+                yield key, name, int(count), weight
+
+    def _position(self, key):
+        i = bisect_left(self._keys, key)
+        return i if i < len(self._keys) and self._keys[i] == key else None
+
+    def add(self, df):
+        """Count the names of newly loaded or queued transactions"""
+        if df.empty:
+            return
+        added = {}
+        for key, name, count, weight in self._by_spelling(df):
+            spellings = self._spellings.setdefault(key, {})
+            spellings[name] = spellings.get(name, 0) + count
+            added[key] = added.get(key, 0.0) + weight
+        new_keys = [key for key in added if self._position(key) is None]
+        if len(new_keys) > 64:
+            scores = dict(zip(self._keys, self._scores))
+            self._keys = sorted(self._spellings)
+            self._scores = np.array([scores.get(key, 0.0) for key in self._keys])
+        else:
+            for key in new_keys:
+                i = bisect_left(self._keys, key)
+                self._keys.insert(i, key)
+                self._scores = np.insert(self._scores, i, 0.0)
+        for key, weight in added.items():
+            self._scores[self._position(key)] += weight
+
+    def remove(self, df):
+        """Take previously added transactions back out"""
+        if df.empty:
+            return
+        for key, name, count, weight in self._by_spelling(df):
+            i = self._position(key)
+            if i is None:
+                continue
+            spellings = self._spellings[key]
+            spellings[name] = spellings.get(name, 0) - count
+            if spellings[name] <= 0:
+                del spellings[name]
+            if spellings:
+                self._scores[i] -= weight
+            else:
+                del self._spellings[key]
+                del self._keys[i]
+                self._scores = np.delete(self._scores, i)
+
+    def _spelling(self, key):
+        spellings = self._spellings[key]
+        return max(spellings, key=spellings.get)
+
+    def suggest(self, prefix="", limit=10):
+        """Up to `limit` names starting with prefix, most used and most recent first, in their usual spelling"""
+        key = name_key(prefix)
+        lo = bisect_left(self._keys, key)
+        hi = bisect_left(self._keys, key + "\U0010ffff")
+        scores = self._scores[lo:hi]
+        if len(scores) > limit:
+            best = np.argpartition(scores, -limit)[-limit:]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [self._spelling(self._keys[lo + i]) for i in best]
+
+    def canonical(self, name):
+        """Usual spelling of a name that differs only in case or spacing, else the name as typed"""
+        key = name_key(name)
+        return self._spelling(key) if key in self._spellings else name.strip()
+
+    def __len__(self):
+        return len(self._keys)
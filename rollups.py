@@ -0,0 +1,46 @@
+import pandas as pd
+
+ROLLUP_KEYS = ["Date", "User", "Type", "Payment Mode"]
+
+
+class DailyRollup:
+    """Running Amount/Count totals keyed by (date, user, type, payment mode)
+
+    Expects normalized transactions (see transaction_store.normalize_transactions).
+    """
+
+    def __init__(self):
+        self._totals = {}
+        self._frame = None
+
+    def add(self, df):
+        """Fold newly loaded transactions into the totals"""
+        if df.empty:
+            return
+        grouped = df.groupby(ROLLUP_KEYS, sort=False, observed=True)['Amount'].agg(['sum', 'count'])
+        for key, amount, count in zip(grouped.index, grouped['sum'], grouped['count']):
+            totals = self._totals.setdefault(key, [0.0, 0])
+            totals[0] += amount
+            totals[1] += count
+        self._frame = None
+
+    def remove(self, df):
+        """Take previously added transactions back out of the totals"""
+        if df.empty:
+            return
+        grouped = df.groupby(ROLLUP_KEYS, sort=False, observed=True)['Amount'].agg(['sum', 'count'])
+        for key, amount, count in zip(grouped.index, grouped['sum'], grouped['count']):
+            totals = self._totals[key]
+            totals[0] -= amount
+            totals[1] -= count
+            if totals[1] <= 0:
+                del self._totals[key]
+        self._frame = None
+
+    def frame(self):
+        """Totals as a DataFrame with ROLLUP_KEYS plus Amount and Count columns, in Date order"""
+        if self._frame is None:
+            rows = [(*key, amount, count) for key, (amount, count) in self._totals.items()]
+            frame = pd.DataFrame(rows, columns=ROLLUP_KEYS + ["Amount", "Count"])
+            self._frame = frame.sort_values("Date", kind="stable", ignore_index=True)
+        return self._frame
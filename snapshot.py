@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import threading
+from contextlib import nullcontext
+
+logger = logging.getLogger("tracker.snapshot")
+
+SNAPSHOT_VERSION = "3"
+SAVE_EVERY_ROWS = 500
+
+
+class TransactionSnapshot:
+    """Normalized transaction history kept on local disk as an uncompressed Arrow file
+
+    The file records the backend's read position after the rows it covers (its
+    high-water mark), so a new process memory-maps it instead of downloading and
+    parsing the whole history, then reads only the rows stored after that mark.
+    Storage is assumed append-only, as it already is for the store's
+    incremental reads. Processes can share one file: given a lock (a callable
+    returning a context manager that yields whether it was taken, such as
+    Coordinator.try_lock), one process saves at a time, and only when the file
+    holds fewer rows than it has loaded.
+    """
+
+    def __init__(self, path, save_every=SAVE_EVERY_ROWS, lock=None):
+        self.path = path
+        self.save_every = save_every
+        self.lock = lock
+        self.saved_rows = 0
+        self._saving = threading.Lock()
+
+    def load(self, headers):
+        """(frame, read position) from the snapshot, or (None, None) if missing or written for other columns"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return None, None
+        if not os.path.exists(self.path):
+            return None, None
+        table = pa.ipc.open_file(pa.memory_map(self.path, "r")).read_all()
+        metadata = table.schema.metadata or {}
+        if metadata.get(b"tracker.version") != SNAPSHOT_VERSION.encode():
+            return None, None
+        if json.loads(metadata.get(b"tracker.headers", b"[]")) != list(headers):
+            return None, None
+        position = json.loads(metadata[b"tracker.position"])
+        # split_blocks keeps each column its own (mapped) buffer rather than consolidating copies
+        df = table.to_pandas(split_blocks=True)
+        self.saved_rows = len(df)
+        return df, position
+
+    def save(self, df, position, headers):
+        """Write the frame holding every row stored up to read position, replacing the file atomically"""
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"tracker.version": SNAPSHOT_VERSION.encode(),
+            b"tracker.position": json.dumps(position).encode(),
+            b"tracker.rows": str(len(df)).encode(),
+            b"tracker.headers": json.dumps(list(headers)).encode(),
+        })
+        # Processes still mapping the old file keep reading it until they reload
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, self.path)
+        self.saved_rows = len(df)
+
+    def rows_on_disk(self):
+        """Rows held by the current file, from its metadata alone; 0 if missing or unreadable"""
+        try:
+            import pyarrow as pa
+
+            metadata = pa.ipc.open_file(pa.memory_map(self.path, "r")).schema.metadata or {}
+            if metadata.get(b"tracker.version") != SNAPSHOT_VERSION.encode():
+                return 0
+            return int(metadata.get(b"tracker.rows", 0))
+        except Exception:
+            return 0
+
+    def save_in_background(self, df, position, headers):
+        """Save on a daemon thread once save_every rows are newer than the file; skipped while a save runs"""
+        if df.empty or (self.saved_rows and len(df) - self.saved_rows < self.save_every):
+            return
+        if not self._saving.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                with self.lock() if self.lock else nullcontext(True) as held:
+                    if held and self.rows_on_disk() < len(df):
+                        self.save(df, position, headers)
+                    elif held:
+                        # Another process has saved at least as much already
+                        self.saved_rows = len(df)
+            except Exception:
+                logger.warning("Could not save transaction snapshot to %s", self.path, exc_info=True)
+            finally:
+                self._saving.release()
+        threading.Thread(target=run, name="transaction-snapshot", daemon=True).start()
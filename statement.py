@@ -0,0 +1,115 @@
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from itertools import islice
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from aggregations import totals
+
+PDF_ROWS_PER_TABLE = 40
+NAVY = colors.Color(0, 0, 104/255)
+TRANSACTION_HEADER = ['Date', 'Name', 'Type', 'Amount', 'Payment', 'Description']
+TRANSACTION_COL_WIDTHS = [0.9*inch, 1.2*inch, 0.9*inch, 1*inch, 0.9*inch, 1.6*inch]
+
+
+@lru_cache(maxsize=None)
+def paragraph_styles():
+    """Body and title styles, built once per process"""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=NAVY, spaceAfter=30, alignment=1)
+    return styles['Normal'], title_style
+
+
+@lru_cache(maxsize=None)
+def summary_table_style():
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), NAVY),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 11),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ])
+
+
+@lru_cache(maxsize=None)
+def transactions_table_style():
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), NAVY),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ])
+
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate that pulls flowables from an iterator while laying out pages"""
+
+    def build(self, flowables, source=(), **kwargs):
+        self._flowables = flowables
+        self._source = iter(source)
+        SimpleDocTemplate.build(self, flowables, **kwargs)
+
+    def handle_flowable(self, flowables):
+        # Keep a couple of flowables queued so build() never sees an empty list early
+        if flowables is self._flowables and len(flowables) < 2:
+            flowables.extend(islice(self._source, 2))
+        SimpleDocTemplate.handle_flowable(self, flowables)
+
+
+def iter_statement_tables(df, progress=None):
+    """Yield the transaction listing newest first as page-sized Tables, reporting the fraction laid out"""
+    desc_col = 'Description' if 'Description' in df.columns else 'Notes' if 'Notes' in df.columns else None
+    table_style = transactions_table_style()
+    order = df['Timestamp'].to_numpy().argsort(kind='stable')[::-1]
+    for start in range(0, len(order), PDF_ROWS_PER_TABLE):
+        chunk = df.iloc[order[start:start + PDF_ROWS_PER_TABLE]]
+        descriptions = chunk[desc_col] if desc_col else [''] * len(chunk)
+        table_data = [TRANSACTION_HEADER]
+        for timestamp, name, txn_type, amount, mode, desc_value in zip(chunk['Timestamp'], chunk['Name'], chunk['Type'], chunk['Amount'], chunk['Payment Mode'], descriptions):
+            table_data.append([timestamp.strftime('%d %b %y'), str(name)[:20], txn_type, f"₹{amount:,.0f}", mode, str(desc_value)[:30] if desc_value else ''])
+        table = Table(table_data, colWidths=TRANSACTION_COL_WIDTHS, repeatRows=1)
+        table.setStyle(table_style)
+        if progress:
+            progress(start / len(order))
+        yield table
+
+
+def create_pdf_statement(df, start_date, end_date, username, is_admin, progress=None):
+    """Render a statement of accounts for df as a PDF in a BytesIO"""
+    buffer = BytesIO()
+    doc = StreamingDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
+    normal_style, title_style = paragraph_styles()
+    elements = [Paragraph("Statement of Accounts", title_style), Spacer(1, 12)]
+    info_text = f"<b>Period:</b> {start_date.strftime('%d %b %Y')} to {end_date.strftime('%d %b %Y')}<br/>"
+    if not is_admin:
+        info_text += f"<b>User:</b> {username}<br/>"
+    info_text += f"<b>Generated on:</b> {datetime.now().strftime('%d %b %Y %I:%M %p')}"
+    elements.append(Paragraph(info_text, normal_style))
+    elements.append(Spacer(1, 20))
+    total_paid, total_received, balance = totals(df)
+    summary_data = [['Summary', ''], ['Total Paid', f'₹{total_paid:,.2f}'], ['Total Received', f'₹{total_received:,.2f}'], ['Net Balance', f'₹{balance:,.2f}']]
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+    summary_table.setStyle(summary_table_style())
+    elements.append(summary_table)
+    elements.append(Spacer(1, 30))
+    doc.build(elements, source=iter_statement_tables(df, progress))
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+
+class StatementCache:
+    """LRU cache of generated statement PDFs keyed by (scope, start_date, end_date)
+
+    scope is the username for a user's own statement, or None for the admin
+    all-users statement. Entries are dropped only when a transaction inside
+    their date range (and scope) is appended, so unrelated writes keep them warm.
+    Each key also has a counter that such appends increase, so a statement whose
+    data was read before one of them is not cached after it.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_keys=4096):
+        self.max_bytes = max_bytes
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = OrderedDict()
+        self._size = 0
+
+    def version(self, key):
+        """Counter of appends that touched key; read it before querying the statement's rows"""
+        with self._lock:
+            version = self._versions.pop(key, 0)
+            self._versions[key] = version
+            if len(self._versions) > self.max_keys:
+                self._versions.popitem(last=False)
+            return version
+
+    def get(self, key):
+        """Cached PDF bytes for key, or None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data, version=None):
+        """Store PDF bytes, evicting least recently used entries over the size cap
+
+        With the version() read before the statement's rows were, the bytes are
+        dropped if an append inside its range came in meanwhile.
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if version is not None and self._versions.get(key) != version:
+                return
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def on_append(self, new_df):
+        """Drop statements whose range and scope cover any of the new transactions"""
+        touched = set(zip(new_df['User'], new_df['Timestamp'].dt.date))
+        with self._lock:
+            for key in set(self._entries) | set(self._versions):
+                scope, start_date, end_date = key
+                if any(start_date <= day <= end_date and scope in (None, user) for user, day in touched):
+                    if key in self._versions:
+                        self._versions[key] += 1
+                    if key in self._entries:
+                        self._size -= len(self._entries.pop(key))
@@ -0,0 +1,465 @@
+import csv
+import io
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+import gspread
+from gspread.utils import absolute_range_name
+
+from auth import hash_password
+
+logger = logging.getLogger("tracker.storage")
+
+TRANSACTION_HEADERS = ["Timestamp", "User", "Name", "Description", "Amount", "Type", "Payment Mode"]
+TRANSACTION_TYPES = ["Paid", "Received"]
+PAYMENT_MODES = ["Online", "GPay", "PhonePe", "Cash"]
+CREDENTIAL_HEADERS = ["Username", "Password", "Phone", "Name", "Role"]
+DEFAULT_ADMIN = ["admin", "admin123", "0000000000", "Admin", "admin"]
+
+# Older sheets used "Notes" for the description column
+HEADER_ALIASES = {"Notes": "Description"}
+
+
+class SchemaError(Exception):
+    """Stored header layout does not match the columns the app writes"""
+
+
+def check_headers(actual, expected, where):
+    """Raise SchemaError unless `actual` starts with the `expected` columns, in order"""
+    found = [HEADER_ALIASES.get(col, col) for col in actual[:len(expected)]]
+    if found != expected:
+        raise SchemaError(f"{where} columns are {actual}, expected {expected}")
+
+
+def default_admin_row():
+    """Seed admin account with its password hashed"""
+    username, password, *rest = DEFAULT_ADMIN
+    return [username, hash_password(password), *rest]
+
+
+class StorageBackend:
+    """Interface the app uses to read and write transactions and accounts"""
+
+    def bootstrap(self):
+        """Create missing tables/headers and validate the column layout; run once per process"""
+        raise NotImplementedError
+
+    def transaction_headers(self):
+        """Column names of the stored transactions"""
+        raise NotImplementedError
+
+    def read_transactions(self, position=None):
+        """(rows stored since position, position after them); None reads every row
+
+        Rows are lists. A position is a JSON value that only the backend which
+        returned it interprets.
+        """
+        raise NotImplementedError
+
+    def query_transactions(self, user=None, start_date=None, end_date=None):
+        """Transaction rows for one user and/or inclusive date range, filtered by the store itself"""
+        raise NotImplementedError
+
+    def append_transaction(self, row):
+        """Append one transaction row"""
+        self.append_transactions([row])
+
+    def append_transactions(self, rows):
+        """Append several transaction rows in a single write"""
+        raise NotImplementedError
+
+    def read_credentials(self):
+        """All user accounts as dicts keyed by CREDENTIAL_HEADERS"""
+        raise NotImplementedError
+
+    def append_credential(self, row):
+        """Append one user account row"""
+        raise NotImplementedError
+
+    def update_password(self, username, password_hash):
+        """Replace the stored password of an existing account"""
+        raise NotImplementedError
+
+
+class SheetsBackend(StorageBackend):
+    """Google Sheets storage: transactions on sheet1, accounts on 'credentials'"""
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        self.transactions_sheet = None
+        self.credentials_sheet = None
+        self._headers = None
+
+    def bootstrap(self):
+        # Worksheet handles and headers are fetched here once, so steady-state
+        # reads and writes make no metadata requests
+        self.transactions_sheet = self.spreadsheet.sheet1
+        headers = self.transactions_sheet.row_values(1)
+        if not headers:
+            self.transactions_sheet.append_row(TRANSACTION_HEADERS)
+            headers = TRANSACTION_HEADERS
+        check_headers(headers, TRANSACTION_HEADERS, "Transactions sheet")
+        self._headers = headers
+
+        try:
+            self.credentials_sheet = self.spreadsheet.worksheet("credentials")
+        except gspread.WorksheetNotFound:
+            self.credentials_sheet = self.spreadsheet.add_worksheet(title="credentials", rows="100", cols="5")
+            self.credentials_sheet.append_rows([CREDENTIAL_HEADERS, default_admin_row()])
+        check_headers(self.credentials_sheet.row_values(1), CREDENTIAL_HEADERS, "Credentials sheet")
+
+    def transaction_headers(self):
+        return self._headers
+
+    def read_transactions(self, position=None):
+        # The position is the number of data rows already read
+        offset = position or 0
+        if offset == 0:
+            rows = self.transactions_sheet.get_all_values()[1:]
+        else:
+            # Only the rows below the last one the caller has already seen
+            last_col = chr(ord('A') + len(self.transaction_headers()) - 1)
+            rows = self.transactions_sheet.get_values(f"A{offset + 2}:{last_col}")
+        # gspread reads an empty range as [[]]; rows left blank inside the sheet
+        # still count towards the offset but are not transactions
+        rows = [row for row in rows if row]
+        return [row for row in rows if any(row)], offset + len(rows)
+
+    def query_transactions(self, user=None, start_date=None, end_date=None):
+        return self._query_sheet(self.transactions_sheet, user, start_date, end_date)
+
+    def _query_sheet(self, sheet, user, start_date, end_date):
+        # Filter server-side with the Visualization API query language; Timestamp is
+        # stored as 'YYYY-MM-DD HH:MM:SS' text, so string comparison orders by time
+        clauses = []
+        if user is not None:
+            if "'" in user and '"' in user:
+                raise ValueError(f"Cannot quote username {user!r} in a sheet query")
+            quote = '"' if "'" in user else "'"
+            clauses.append(f"B = {quote}{user}{quote}")
+        if start_date is not None:
+            clauses.append(f"A >= '{start_date:%Y-%m-%d}'")
+        if end_date is not None:
+            clauses.append(f"A < '{end_date + timedelta(days=1):%Y-%m-%d}'")
+        query = "select *" + (" where " + " and ".join(clauses) if clauses else "")
+        response = self.spreadsheet.client.request(
+            "get",
+            f"https://docs.google.com/spreadsheets/d/{self.spreadsheet.id}/gviz/tq",
+            params={"tq": query, "tqx": "out:csv", "gid": sheet.id, "headers": 1},
+        )
+        return list(csv.reader(io.StringIO(response.text)))[1:]
+
+    def append_transactions(self, rows):
+        self.transactions_sheet.append_rows(rows)
+
+    def read_credentials(self):
+        return self.credentials_sheet.get_all_records()
+
+    def append_credential(self, row):
+        self.credentials_sheet.append_row(row)
+
+    def update_password(self, username, password_hash):
+        cell = self.credentials_sheet.find(str(username), in_column=1)
+        if cell is None:
+            raise KeyError(f"No account named {username!r}")
+        self.credentials_sheet.update_cell(cell.row, CREDENTIAL_HEADERS.index("Password") + 1, password_hash)
+
+
+def month_key(timestamp):
+    """Partition key 'YYYY_MM' for a 'YYYY-MM-DD ...' timestamp string or date"""
+    return f"{timestamp:%Y_%m}" if hasattr(timestamp, "year") else str(timestamp)[:7].replace("-", "_")
+
+
+def months_between(start_date, end_date):
+    """Partition keys of every month from start_date to end_date inclusive"""
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield f"{year:04d}_{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _to_float(value):
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return 0.0
+
+
+class PartitionedSheetsBackend(SheetsBackend):
+    """Google Sheets storage with one 'transactions_YYYY_MM' worksheet per month
+
+    Writes roll over to a new worksheet when the month changes. Months older than
+    the previous one are compacted: their per-user totals are appended to
+    'monthly_summary' and the worksheet is renamed 'archive_YYYY_MM' and hidden.
+    sheet1 keeps any history written before partitioning and is read first.
+    Late entries can land in any month's worksheet, so a read position counts
+    the rows read from each worksheet rather than from the history as a whole.
+    Summaries and compaction never fail a write whose rows are stored: they are
+    retried after the next one.
+    """
+
+    PARTITION_PREFIX = "transactions_"
+    ARCHIVE_PREFIX = "archive_"
+    SUMMARY_SHEET = "monthly_summary"
+    SUMMARY_HEADERS = ["Month", "User", "Type", "Payment Mode", "Amount", "Count"]
+
+    def __init__(self, spreadsheet, now=datetime.now):
+        super().__init__(spreadsheet)
+        self.now = now
+        self._partitions = {}
+        self._legacy_has_rows = True
+        self._appending = threading.Lock()
+        # Rows stored by a batch that then failed, which its retry must not send again
+        self._stored = Counter()
+        self._summaries_due = []
+        self._compaction_due = False
+
+    def bootstrap(self):
+        super().bootstrap()
+        # gspread reads an empty range as [[]]
+        self._legacy_has_rows = any(any(row) for row in self.transactions_sheet.get_values("A2:A2"))
+        self._refresh_partitions()
+
+    def _refresh_partitions(self):
+        # Other processes create partitions and archive them; cached worksheet
+        # titles do not follow, so list them again before relying on either
+        for sheet in self.spreadsheet.worksheets():
+            month = self._month_of(sheet.title)
+            if month:
+                self._partitions[month] = sheet
+
+    def _month_of(self, title):
+        for prefix in (self.PARTITION_PREFIX, self.ARCHIVE_PREFIX):
+            if title.startswith(prefix):
+                return title[len(prefix):]
+        return None
+
+    def _is_archived(self, sheet):
+        return sheet.title.startswith(self.ARCHIVE_PREFIX)
+
+    def _partition(self, month, create=False):
+        sheet = self._partitions.get(month)
+        if sheet is not None:
+            return sheet
+        title = self.PARTITION_PREFIX + month
+        try:
+            sheet = self.spreadsheet.worksheet(title)
+        except gspread.WorksheetNotFound:
+            if not create:
+                return None
+            try:
+                sheet = self.spreadsheet.add_worksheet(title=title, rows=1000, cols=len(TRANSACTION_HEADERS))
+                sheet.append_row(TRANSACTION_HEADERS)
+            except gspread.exceptions.APIError:
+                # Another process created it first
+                sheet = self.spreadsheet.worksheet(title)
+        self._partitions[month] = sheet
+        return sheet
+
+    def _sheets(self, months=None):
+        """Legacy sheet plus the partitions for `months` (all known months if None), oldest first"""
+        sheets = [self.transactions_sheet] if self._legacy_has_rows else []
+        for month in sorted(self._partitions if months is None else months):
+            sheet = self._partitions.get(month)
+            if sheet is not None:
+                sheets.append(sheet)
+        return sheets
+
+    def read_transactions(self, position=None):
+        # The position maps each worksheet id to the data rows read from it. An
+        # integer is a position from before partitioning: rows read from sheet1.
+        if not isinstance(position, dict):
+            position = {str(self.transactions_sheet.id): position} if position else {}
+        # Every worksheet's new rows come in one request
+        self._refresh_partitions()
+        sheets = [self.transactions_sheet] + [self._partitions[month] for month in sorted(self._partitions)]
+        last_col = chr(ord('A') + len(TRANSACTION_HEADERS) - 1)
+        ranges = [absolute_range_name(sheet.title, f"A{position.get(str(sheet.id), 0) + 2}:{last_col}") for sheet in sheets]
+        response = self.spreadsheet.values_batch_get(ranges)
+        rows, new_position = [], dict(position)
+        for sheet, value_range in zip(sheets, response.get("valueRanges", [])):
+            values = value_range.get("values", [])
+            new_position[str(sheet.id)] = position.get(str(sheet.id), 0) + len(values)
+            rows.extend(row for row in values if any(row))
+        return rows, new_position
+
+    def query_transactions(self, user=None, start_date=None, end_date=None):
+        self._refresh_partitions()
+        months = None
+        if start_date is not None and end_date is not None:
+            months = list(months_between(start_date, end_date))
+        rows = []
+        for sheet in self._sheets(months):
+            rows.extend(self._query_sheet(sheet, user, start_date, end_date))
+        return rows
+
+    def append_transactions(self, rows):
+        with self._appending:
+            cutoff = self._cutoff()
+            if any(month_key(row[0]) < cutoff or month_key(row[0]) not in self._partitions for row in rows):
+                # Late entries go to months another process may have archived meanwhile
+                self._refresh_partitions()
+            by_month = {}
+            for row in rows:
+                key = tuple(str(value) for value in row)
+                if self._stored[key] > 0:
+                    self._stored[key] -= 1
+                else:
+                    by_month.setdefault(month_key(row[0]), []).append(row)
+            for month, month_rows in sorted(by_month.items()):
+                if month not in self._partitions:
+                    self._compaction_due = True
+                sheet = self._partition(month, create=True)
+                sheet.append_rows(month_rows)
+                self._stored.update(tuple(str(value) for value in row) for row in month_rows)
+                if self._is_archived(sheet):
+                    # Late entry for a compacted month: keep its summary in step
+                    self._summaries_due.append((month, month_rows))
+            self._stored.clear()
+            self._catch_up()
+
+    def _catch_up(self):
+        try:
+            while self._summaries_due:
+                self._append_summary(*self._summaries_due[0])
+                self._summaries_due.pop(0)
+            if self._compaction_due:
+                self.compact_closed_months()
+                self._compaction_due = False
+        except Exception:
+            logger.warning("Monthly summary upkeep failed; retrying after the next write", exc_info=True)
+
+    def compact_closed_months(self):
+        """Summarize and archive every live partition older than the previous month
+
+        Safe to repeat after a failure: a month already in the summary is not added again.
+        Run it under the coordinator's write lock, as append_transactions is by
+        LockedBackend, so replicas see each other's archiving.
+        """
+        self._refresh_partitions()
+        cutoff = self._cutoff()
+        summarized = None
+        for month, sheet in sorted(self._partitions.items()):
+            if month >= cutoff or self._is_archived(sheet):
+                continue
+            if summarized is None:
+                summarized = self._summarized_months()
+            if month.replace("_", "-") not in summarized:
+                self._append_summary(month, sheet.get_all_values()[1:])
+            # Renamed last, so a failure part-way leaves the month to be finished next time
+            sheet.hide()
+            sheet.update_title(self.ARCHIVE_PREFIX + month)
+
+    def _cutoff(self):
+        # Months before this one are closed and get compacted
+        return month_key(self.now().date().replace(day=1) - timedelta(days=1))
+
+    def _summarized_months(self):
+        try:
+            summary = self.spreadsheet.worksheet(self.SUMMARY_SHEET)
+        except gspread.WorksheetNotFound:
+            return set()
+        return {row[0] for row in summary.get_values("A2:A") if row}
+
+    def _append_summary(self, month, rows):
+        totals = {}
+        for row in rows:
+            row = (list(row) + [''] * len(TRANSACTION_HEADERS))[:len(TRANSACTION_HEADERS)]
+            key = (row[1], row[5], row[6])
+            entry = totals.setdefault(key, [0.0, 0])
+            entry[0] += _to_float(row[4])
+            entry[1] += 1
+        if not totals:
+            return
+        try:
+            summary = self.spreadsheet.worksheet(self.SUMMARY_SHEET)
+        except gspread.WorksheetNotFound:
+            summary = self.spreadsheet.add_worksheet(title=self.SUMMARY_SHEET, rows=1000, cols=len(self.SUMMARY_HEADERS))
+            summary.append_row(self.SUMMARY_HEADERS)
+        summary.append_rows([[month.replace("_", "-"), *key, amount, count] for key, (amount, count) in sorted(totals.items())])
+
+
+class SQLiteBackend(StorageBackend):
+    """Local SQLite storage with indexed transaction reads, for offline use and load tests"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS credentials ("
+                "username TEXT PRIMARY KEY COLLATE NOCASE, password TEXT, phone TEXT, name TEXT, role TEXT)"
+            )
+            if not self._conn.execute("SELECT 1 FROM credentials LIMIT 1").fetchone():
+                self._conn.execute("INSERT OR IGNORE INTO credentials VALUES (?, ?, ?, ?, ?)", default_admin_row())
+
+    def bootstrap(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transactions ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, user TEXT, name TEXT, "
+                "description TEXT, amount REAL, type TEXT, payment_mode TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions (timestamp)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user, timestamp)")
+
+    def transaction_headers(self):
+        return TRANSACTION_HEADERS
+
+    def read_transactions(self, position=None):
+        # The position is the id of the last row read
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT id, timestamp, user, name, description, amount, type, payment_mode "
+                "FROM transactions WHERE id > ? ORDER BY id",
+                (position or 0,)
+            )
+            rows = cursor.fetchall()
+        return [list(row[1:]) for row in rows], rows[-1][0] if rows else position or 0
+
+    def query_transactions(self, user=None, start_date=None, end_date=None):
+        clauses, params = [], []
+        if user is not None:
+            clauses.append("user = ?")
+            params.append(user)
+        if start_date is not None:
+            clauses.append("timestamp >= ?")
+            params.append(f"{start_date:%Y-%m-%d}")
+        if end_date is not None:
+            clauses.append("timestamp < ?")
+            params.append(f"{end_date + timedelta(days=1):%Y-%m-%d}")
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT timestamp, user, name, description, amount, type, payment_mode "
+                f"FROM transactions{where} ORDER BY id",
+                params
+            )
+            return [list(row) for row in cursor]
+
+    def append_transactions(self, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO transactions (timestamp, user, name, description, amount, type, payment_mode) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def read_credentials(self):
+        with self._lock:
+            cursor = self._conn.execute("SELECT username, password, phone, name, role FROM credentials")
+            return [dict(zip(CREDENTIAL_HEADERS, row)) for row in cursor]
+
+    def append_credential(self, row):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO credentials VALUES (?, ?, ?, ?, ?)", row)
+
+    def update_password(self, username, password_hash):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE credentials SET password = ? WHERE username = ?", (password_hash, username))
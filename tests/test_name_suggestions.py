@@ -0,0 +1,47 @@
+"""Per-user payee suggestions kept in step with new entries
+
+Run from the repository root: python -m pytest tests
+"""
+import pytest
+
+from storage import SQLiteBackend
+from transaction_store import TransactionStore
+
+
+def row(user, name, day=1):
+    return [f"2026-10-{day:02d} 09:00:00", user, name, "", "10", "Paid", "Cash"]
+
+
+@pytest.fixture(params=["pushed down", "full history"])
+def store(request, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "tracker.db"))
+    backend.bootstrap()
+    backend.append_transactions([row("alice", "Ravi"), row("bob", "Secret Vendor")])
+    store = TransactionStore(backend)
+    if request.param == "full history":
+        store.get_transactions()
+    return store
+
+
+def submit(store, write_id, values):
+    store.add_pending(write_id, values)
+    store.backend.append_transactions([values])
+    store.confirm([write_id])
+
+
+def test_suggestions_are_the_users_own(store):
+    assert store.suggest_names(user="alice") == ["Ravi"]
+    assert store.canonical_name("secret  VENDOR", "alice") == "secret  VENDOR"
+
+
+def test_new_entries_update_the_index_without_rebuilding_it(store):
+    store.suggest_names(user="alice")
+    index = store._user_names["alice"][1]
+
+    submit(store, 1, row("bob", "Bob's Vendor", day=2))
+    submit(store, 2, row("alice", "Asha", day=3))
+
+    assert store.suggest_names(user="alice") == ["Asha", "Ravi"]
+    assert store._user_names["alice"][1] is index
+    assert index._spellings["asha"] == {"Asha": 1}
+    assert store.suggest_names(user="bob") == ["Bob's Vendor", "Secret Vendor"]
@@ -0,0 +1,68 @@
+"""Incremental reads of monthly worksheets when entries arrive for earlier months
+
+Run from the repository root: python -m pytest tests
+"""
+from datetime import datetime
+
+from benchmarks.fake_sheets import open_fake_spreadsheet
+from snapshot import TransactionSnapshot
+from storage import TRANSACTION_HEADERS, PartitionedSheetsBackend
+from transaction_store import TransactionStore, normalize_transactions
+
+NOW = datetime(2026, 10, 15, 12, 0)
+
+
+def row(timestamp, name):
+    return [timestamp, "alice", name, "", "10", "Paid", "Cash"]
+
+
+def backend(spreadsheet):
+    backend = PartitionedSheetsBackend(spreadsheet, now=lambda: NOW)
+    backend.bootstrap()
+    return backend
+
+
+def names(store):
+    return list(store.get_transactions()['Name'])
+
+
+def test_invalidate_reads_rows_added_to_earlier_months():
+    spreadsheet = open_fake_spreadsheet([], TRANSACTION_HEADERS)
+    writer = backend(spreadsheet)
+    writer.append_transactions([row("2026-10-01 09:00:00", "oct 1")])
+    store = TransactionStore(backend(spreadsheet))
+    assert names(store) == ["oct 1"]
+
+    # A late entry lands in (and archives) March's worksheet, ahead of October's
+    writer.append_transactions([row("2026-03-11 09:00:00", "mar 11")])
+    writer.append_transactions([row("2026-10-02 09:00:00", "oct 2")])
+    store.invalidate()
+
+    assert names(store) == ["mar 11", "oct 1", "oct 2"]
+    assert names(store) == names(TransactionStore(backend(spreadsheet)))
+
+
+def test_snapshot_position_counts_rows_per_worksheet(tmp_path):
+    spreadsheet = open_fake_spreadsheet([], TRANSACTION_HEADERS)
+    writer = backend(spreadsheet)
+    writer.append_transactions([row("2026-10-01 09:00:00", "oct 1")])
+    path = str(tmp_path / "transactions.arrow")
+    rows, position = writer.read_transactions()
+    TransactionSnapshot(path).save(normalize_transactions(TRANSACTION_HEADERS, rows), position, TRANSACTION_HEADERS)
+
+    writer.append_transactions([row("2026-03-11 09:00:00", "mar 11")])
+    writer.append_transactions([row("2026-10-02 09:00:00", "oct 2")])
+    restarted = TransactionStore(backend(spreadsheet), snapshot=TransactionSnapshot(path))
+
+    assert names(restarted) == ["mar 11", "oct 1", "oct 2"]
+
+
+def test_position_from_before_partitioning_continues_on_sheet1():
+    spreadsheet = open_fake_spreadsheet([row("2026-09-01 09:00:00", "sep 1")], TRANSACTION_HEADERS)
+    partitioned = backend(spreadsheet)
+    partitioned.append_transactions([row("2026-10-01 09:00:00", "oct 1")])
+
+    rows, position = partitioned.read_transactions(1)
+
+    assert [r[2] for r in rows] == ["oct 1"]
+    assert partitioned.read_transactions(position) == ([], position)
@@ -0,0 +1,125 @@
+"""Writes to monthly worksheets when other processes touch the same spreadsheet
+
+Run from the repository root: python -m pytest tests
+"""
+from datetime import datetime
+
+import gspread
+import pytest
+
+from benchmarks.fake_sheets import FakeResponse, FakeWorksheet, open_fake_spreadsheet
+from storage import TRANSACTION_HEADERS, PartitionedSheetsBackend
+
+NOW = datetime(2026, 10, 15, 12, 0)
+
+
+def row(timestamp, name):
+    return [timestamp, "alice", name, "", "10", "Paid", "Cash"]
+
+
+def backend(spreadsheet):
+    backend = PartitionedSheetsBackend(spreadsheet, now=lambda: NOW)
+    backend.bootstrap()
+    return backend
+
+
+def fail_once(monkeypatch, name, title):
+    """Make the first FakeWorksheet.<name> call on the worksheet titled `title` fail"""
+    method = getattr(FakeWorksheet, name)
+    failed = []
+
+    def flaky(sheet, *args, **kwargs):
+        if sheet.title == title and not failed:
+            failed.append(title)
+            raise gspread.exceptions.APIError(FakeResponse("unavailable", {"code": 503, "message": "unavailable"}))
+        return method(sheet, *args, **kwargs)
+
+    monkeypatch.setattr(FakeWorksheet, name, flaky)
+
+
+def worksheet(spreadsheet, title):
+    return next(sheet for sheet in spreadsheet._worksheets if sheet.title == title)
+
+
+def stored(spreadsheet, title):
+    return [values[2] for values in worksheet(spreadsheet, title).values[1:]]
+
+
+def test_partition_created_meanwhile_by_another_process_is_reused(monkeypatch):
+    spreadsheet = open_fake_spreadsheet([], TRANSACTION_HEADERS)
+    first, second = backend(spreadsheet), backend(spreadsheet)
+    lookup = spreadsheet.worksheet
+    raced = []
+
+    def worksheet(title):
+        # The other process creates the month just after this one looked for it
+        if title == "transactions_2026_10" and not raced:
+            raced.append(title)
+            first.append_transactions([row("2026-10-01 09:00:00", "first")])
+            raise gspread.WorksheetNotFound(title)
+        return lookup(title)
+
+    monkeypatch.setattr(spreadsheet, "worksheet", worksheet)
+    second.append_transactions([row("2026-10-01 10:00:00", "second")])
+
+    assert [sheet.title for sheet in spreadsheet._worksheets].count("transactions_2026_10") == 1
+    assert stored(spreadsheet, "transactions_2026_10") == ["first", "second"]
+
+
+def test_failed_compaction_does_not_fail_the_write(monkeypatch):
+    spreadsheet = open_fake_spreadsheet([], TRANSACTION_HEADERS)
+    writer = backend(spreadsheet)
+    august = spreadsheet.add_worksheet(title="transactions_2026_08", rows=1000, cols=len(TRANSACTION_HEADERS))
+    august.values = [TRANSACTION_HEADERS, row("2026-08-03 09:00:00", "aug 3")]
+    writer.bootstrap()
+    fail_once(monkeypatch, "hide", "transactions_2026_08")
+
+    writer.append_transactions([row("2026-10-01 09:00:00", "oct 1")])
+    assert stored(spreadsheet, "transactions_2026_10") == ["oct 1"]
+    assert stored(spreadsheet, "transactions_2026_08") == ["aug 3"]
+
+    # The next write finishes the compaction without summarizing August twice
+    writer.append_transactions([row("2026-10-02 09:00:00", "oct 2")])
+    assert stored(spreadsheet, "transactions_2026_10") == ["oct 1", "oct 2"]
+    assert worksheet(spreadsheet, "archive_2026_08").hidden
+    assert [values[0] for values in worksheet(spreadsheet, "monthly_summary").values[1:]] == ["2026-08"]
+
+
+def test_retry_after_a_failed_month_does_not_repeat_stored_months(monkeypatch):
+    spreadsheet = open_fake_spreadsheet([], TRANSACTION_HEADERS)
+    writer = backend(spreadsheet)
+    writer.append_transactions([row("2026-09-30 09:00:00", "sep 30"), row("2026-10-01 09:00:00", "oct 1")])
+    fail_once(monkeypatch, "append_rows", "transactions_2026_10")
+    batch = [row("2026-09-30 10:00:00", "sep 30 late"), row("2026-10-02 09:00:00", "oct 2")]
+
+    with pytest.raises(gspread.exceptions.APIError):
+        writer.append_transactions(batch)
+    writer.append_transactions(batch + [row("2026-10-02 10:00:00", "oct 2 later")])
+
+    assert stored(spreadsheet, "transactions_2026_09") == ["sep 30", "sep 30 late"]
+    assert stored(spreadsheet, "transactions_2026_10") == ["oct 1", "oct 2", "oct 2 later"]
+
+
+def test_queries_see_partitions_created_by_another_process():
+    spreadsheet = open_fake_spreadsheet([], TRANSACTION_HEADERS)
+    first, second = backend(spreadsheet), backend(spreadsheet)
+    first.append_transactions([row("2026-10-01 09:00:00", "oct 1")])
+
+    assert [values[2] for values in second.query_transactions("alice")] == ["oct 1"]
+    october = second.query_transactions("alice", datetime(2026, 10, 1).date(), datetime(2026, 10, 31).date())
+    assert [values[2] for values in october] == ["oct 1"]
+
+
+def test_month_archived_by_another_process_is_not_compacted_again():
+    spreadsheet = open_fake_spreadsheet([], TRANSACTION_HEADERS)
+    august = spreadsheet.add_worksheet(title="transactions_2026_08", rows=1000, cols=len(TRANSACTION_HEADERS))
+    august.values = [TRANSACTION_HEADERS, row("2026-08-03 09:00:00", "aug 3")]
+    first, second = backend(spreadsheet), backend(spreadsheet)
+
+    first.append_transactions([row("2026-10-01 09:00:00", "oct 1")])
+    second.append_transactions([row("2026-10-02 09:00:00", "oct 2"), row("2026-08-04 09:00:00", "aug 4")])
+
+    assert stored(spreadsheet, "archive_2026_08") == ["aug 3", "aug 4"]
+    summary = [values[0] for values in spreadsheet.worksheet("monthly_summary").values[1:]]
+    assert summary == ["2026-08", "2026-08"]
+    assert spreadsheet.calls["update_title"] == 1
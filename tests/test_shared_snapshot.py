@@ -0,0 +1,79 @@
+"""One transaction snapshot shared by the app processes on a host
+
+Run from the repository root: python -m pytest tests
+"""
+import functools
+
+import pytest
+
+from coordination import Coordinator
+from snapshot import TransactionSnapshot
+from storage import SQLiteBackend
+from transaction_store import TransactionStore
+
+pytest.importorskip("pyarrow")
+
+
+def row(i):
+    return [f"2026-10-01 09:{i // 60:02d}:{i % 60:02d}", "alice", f"Payee {i}", "", "10", "Paid", "Cash"]
+
+
+def shared_snapshot(tmp_path, coordinator, save_every=1):
+    return TransactionSnapshot(str(tmp_path / "transactions.arrow"), save_every=save_every,
+                               lock=functools.partial(coordinator.try_lock, "snapshot"))
+
+
+def wait_for_save(snapshot):
+    with snapshot._saving:
+        pass
+
+
+@pytest.fixture
+def coordinator(tmp_path):
+    return Coordinator(str(tmp_path / "coordination.db"))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "tracker.db")
+    backend = SQLiteBackend(path)
+    backend.bootstrap()
+    backend.append_transactions([row(i) for i in range(50)])
+    return path
+
+
+def test_new_process_reads_only_rows_newer_than_the_shared_snapshot(tmp_path, coordinator, db_path):
+    first = TransactionStore(SQLiteBackend(db_path), snapshot=shared_snapshot(tmp_path, coordinator))
+    first.get_transactions()
+    wait_for_save(first.snapshot)
+    SQLiteBackend(db_path).append_transactions([row(50), row(51)])
+
+    backend = SQLiteBackend(db_path)
+    read = []
+    original = backend.read_transactions
+    backend.read_transactions = lambda position=None: read.append(original(position)) or read[-1]
+    second = TransactionStore(backend, snapshot=shared_snapshot(tmp_path, coordinator))
+
+    assert len(second.get_transactions()) == 52
+    assert [len(rows) for rows, _ in read] == [2]
+
+
+def test_process_behind_the_file_does_not_overwrite_it(tmp_path, coordinator, db_path):
+    ahead = TransactionStore(SQLiteBackend(db_path), snapshot=shared_snapshot(tmp_path, coordinator))
+    ahead.get_transactions()
+    wait_for_save(ahead.snapshot)
+
+    behind = shared_snapshot(tmp_path, coordinator)
+    df = ahead.get_transactions().iloc[:10]
+    behind.save_in_background(df, 10, SQLiteBackend(db_path).transaction_headers())
+    wait_for_save(behind)
+
+    assert behind.rows_on_disk() == 50
+
+
+def test_snapshot_lock_is_held_by_one_taker_at_a_time(coordinator):
+    with coordinator.try_lock("snapshot") as held:
+        with coordinator.try_lock("snapshot") as again:
+            assert (held, again) == (True, False)
+    with coordinator.try_lock("snapshot") as held:
+        assert held
@@ -0,0 +1,41 @@
+"""Incremental reads of the single transactions sheet
+
+Run from the repository root: python -m pytest tests
+"""
+from benchmarks.fake_sheets import open_fake_spreadsheet
+from storage import TRANSACTION_HEADERS, SheetsBackend
+from transaction_store import TransactionStore
+
+
+def row(name):
+    return ["2026-10-01 09:00:00", "alice", name, "", "10", "Paid", "Cash"]
+
+
+def backend(spreadsheet):
+    backend = SheetsBackend(spreadsheet)
+    backend.bootstrap()
+    return backend
+
+
+def test_refresh_without_new_rows_keeps_the_offset():
+    spreadsheet = open_fake_spreadsheet([row("a")], TRANSACTION_HEADERS)
+    store = TransactionStore(backend(spreadsheet))
+    assert list(store.get_transactions()['Name']) == ["a"]
+
+    # Nothing new: gspread answers the range below the last row with [[]]
+    store.invalidate()
+    assert list(store.get_transactions()['Name']) == ["a"]
+
+    spreadsheet.sheet1.append_rows([row("b")])
+    store.invalidate()
+    assert list(store.get_transactions()['Name']) == ["a", "b"]
+
+
+def test_blank_rows_are_skipped_but_counted():
+    spreadsheet = open_fake_spreadsheet([row("a"), [""] * len(TRANSACTION_HEADERS), row("b")], TRANSACTION_HEADERS)
+    sheets = backend(spreadsheet)
+
+    rows, position = sheets.read_transactions()
+    assert [values[2] for values in rows] == ["a", "b"]
+    assert position == 3
+    assert sheets.read_transactions(position) == ([], 3)
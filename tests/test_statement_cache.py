@@ -0,0 +1,37 @@
+"""Statement PDFs built while entries for their range arrive
+
+Run from the repository root: python -m pytest tests
+"""
+from datetime import date
+
+from statement_cache import StatementCache
+from storage import TRANSACTION_HEADERS
+from transaction_store import normalize_transactions
+
+OCTOBER = (None, date(2026, 10, 1), date(2026, 10, 31))
+
+
+def appended(timestamp, user="alice"):
+    return normalize_transactions(TRANSACTION_HEADERS, [[timestamp, user, "Shop", "", "10", "Paid", "Cash"]])
+
+
+def test_statement_built_before_an_entry_in_range_is_not_cached():
+    cache = StatementCache()
+    version = cache.version(OCTOBER)
+    cache.on_append(appended("2026-10-02 09:00:00"))
+    cache.put(OCTOBER, b"stale", version)
+    assert cache.get(OCTOBER) is None
+
+
+def test_entries_outside_the_range_or_scope_keep_statements_cacheable():
+    cache = StatementCache()
+    bob = ("bob", date(2026, 10, 1), date(2026, 10, 31))
+    versions = {key: cache.version(key) for key in (OCTOBER, bob)}
+    cache.on_append(appended("2026-09-30 09:00:00"))
+    cache.on_append(appended("2026-10-02 09:00:00", user="alice"))
+
+    cache.put(bob, b"bob", versions[bob])
+    cache.put(OCTOBER, b"everyone", versions[OCTOBER])
+    assert cache.get(bob) == b"bob"
+    assert cache.get(OCTOBER) is None
+    assert cache.version(bob) == versions[bob]
@@ -0,0 +1,492 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from name_index import NameIndex
+from rollups import DailyRollup
+from storage import HEADER_ALIASES, TRANSACTION_HEADERS
+
+logger = logging.getLogger("tracker.store")
+
+CATEGORY_COLUMNS = ["User", "Type", "Payment Mode"]
+
+
+def normalize_transactions(headers, rows):
+    """Typed transaction frame: parsed Timestamp, Date (midnight), float Amount, categorical labels
+
+    Legacy column names (see HEADER_ALIASES) are renamed to the current ones.
+    """
+    width = len(headers)
+    rows = [(list(row) + [''] * width)[:width] for row in rows]
+    df = pd.DataFrame(rows, columns=[HEADER_ALIASES.get(col, col) for col in headers])
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    df['Date'] = df['Timestamp'].dt.normalize()
+    df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce').fillna(0).astype(float)
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype(str).astype('category')
+    return df
+
+
+def concat_transactions(df, new_df):
+    """Append normalized rows, keeping categorical columns categorical"""
+    if df.empty:
+        return new_df
+    columns = {}
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            columns[col] = union_categoricals([df[col], new_df[col]], ignore_order=True)
+        else:
+            columns[col] = pd.concat([df[col], new_df[col]], ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def date_bounds(dates, start_date, end_date):
+    """[lo, hi) positions of the entries of an ascending datetime64 array within [start_date, end_date]"""
+    lo = 0 if start_date is None else dates.searchsorted(pd.Timestamp(start_date).to_datetime64(), 'left')
+    hi = len(dates) if end_date is None else dates.searchsorted(pd.Timestamp(end_date).to_datetime64(), 'right')
+    return int(lo), max(int(lo), int(hi))
+
+
+def slice_date_range(df, start_date, end_date):
+    """Rows whose Date falls within [start_date, end_date]; None leaves that end open
+
+    A frame already in Date order is sliced by binary search instead of masked.
+    """
+    if df.empty or (start_date is None and end_date is None):
+        return df
+    if df['Date'].is_monotonic_increasing:
+        lo, hi = date_bounds(df['Date'].to_numpy(), start_date, end_date)
+        return df.iloc[lo:hi]
+    if start_date is not None:
+        df = df[df['Date'] >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        df = df[df['Date'] <= pd.Timestamp(end_date)]
+    return df
+
+
+def merge_transactions(df, new_df):
+    """Insert Timestamp-sorted rows into a Timestamp-sorted frame without re-sorting it
+
+    Rows with equal timestamps keep their load order.
+    """
+    if df.empty or new_df.empty or new_df['Timestamp'].iloc[0] >= df['Timestamp'].iloc[-1]:
+        return concat_transactions(df, new_df)
+    n = len(df)
+    at = df['Timestamp'].to_numpy().searchsorted(new_df['Timestamp'].to_numpy(), 'right')
+    order = np.insert(np.arange(n), at, np.arange(n, n + len(new_df)))
+    return concat_transactions(df, new_df).take(order).reset_index(drop=True)
+
+
+class TimeIndex:
+    """Positions into a Timestamp-sorted transaction frame, overall and per user
+
+    A date range is a binary search over the Date column; one user's rows in a
+    range are a slice of that user's ascending position array.
+    """
+
+    def __init__(self, df=None):
+        self.dates = np.array([], dtype='datetime64[ns]')
+        self._users = {}
+        if df is not None:
+            self.extend(df, 0)
+
+    def extend(self, new_df, offset):
+        """Index rows appended at position offset onwards, all at or after the last indexed row"""
+        if new_df.empty:
+            return
+        new_dates = new_df['Date'].to_numpy()
+        self.dates = np.concatenate([self.dates, new_dates])
+        for user, positions in new_df.groupby('User', observed=True, sort=False).indices.items():
+            dates = new_dates[positions]
+            positions = positions + offset
+            if user in self._users:
+                old_positions, old_dates = self._users[user]
+                positions = np.concatenate([old_positions, positions])
+                dates = np.concatenate([old_dates, dates])
+            self._users[user] = (positions, dates)
+
+    def date_range(self, start_date, end_date):
+        """[lo, hi) row positions within the date range"""
+        return date_bounds(self.dates, start_date, end_date)
+
+    def user_positions(self, user, start_date, end_date):
+        """Ascending row positions of user's transactions within the date range"""
+        if user not in self._users:
+            return np.array([], dtype=np.intp)
+        positions, dates = self._users[user]
+        lo, hi = date_bounds(dates, start_date, end_date)
+        return positions[lo:hi]
+
+    def select(self, df, user, start_date, end_date):
+        """Rows of the indexed frame df for one user (or everyone) in a date range"""
+        if user is None:
+            lo, hi = self.date_range(start_date, end_date)
+            return df.iloc[lo:hi]
+        return df.take(self.user_positions(user, start_date, end_date))
+
+
+def _row_keys(df):
+    columns = [col for col in TRANSACTION_HEADERS if col in df.columns]
+    return list(df[columns].astype(str).itertuples(index=False, name=None))
+
+
+def _missing_from(new_df, df):
+    """Rows of new_df without an equal row in df, each row of df matching at most once"""
+    if new_df.empty or df.empty:
+        return new_df
+    available = Counter(_row_keys(df))
+    keep = []
+    for key in _row_keys(new_df):
+        keep.append(available[key] <= 0)
+        available[key] -= 1
+    return new_df[keep]
+
+
+def _matches(df, user, start_date, end_date):
+    if user is not None and not df.empty:
+        df = df[df['User'] == user]
+    return slice_date_range(df, start_date, end_date)
+
+
+class TransactionStore:
+    """Process-wide cache of stored transactions, refreshed incrementally
+
+    Loaded rows are kept in Timestamp order with a TimeIndex, so in-memory
+    queries are binary searches rather than scans of the whole history. With a
+    snapshot, the first load starts from the copy on disk and fetches only the
+    rows stored since, and the copy is refreshed in the background as rows arrive.
+    Rows queued for writing can be shown straight away with add_pending(); they
+    count in every read until confirm() replaces them with the stored rows.
+    `revision` increases whenever what reads return may have changed. With
+    ttl=None, reads never go to storage on their own once loaded; rows stored
+    elsewhere arrive when invalidate() or poll() is called. With a
+    coordinator, writes by other processes on the host invalidate it immediately
+    instead of after the ttl.
+    """
+
+    GENERATION = "transactions"
+
+    def __init__(self, backend, ttl=60, max_queries=256, coordinator=None, snapshot=None):
+        self.backend = backend
+        self.coordinator = coordinator
+        self.snapshot = snapshot
+        self.ttl = ttl
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self._df = pd.DataFrame()
+        self._index = TimeIndex()
+        self._rollup = DailyRollup()
+        self._names = NameIndex()
+        self._user_names = {}
+        self._listeners = []
+        self._queries = {}
+        self._position = None
+        self._fetched_at = None
+        self._stale = True
+        self._pending = {}
+        self._pending_df = None
+        self._view = None
+        self.revision = 0
+        self._generation = coordinator.generation(self.GENERATION) if coordinator else 0
+
+    def add_listener(self, callback):
+        """Call callback(new_rows_df) whenever newly loaded rows are added"""
+        self._listeners.append(callback)
+
+    def invalidate(self):
+        """Make the next read fetch rows appended since the last load"""
+        with self._lock:
+            self._stale = True
+            self._queries.clear()
+            self._changed()
+        if self.coordinator:
+            self.coordinator.bump(self.GENERATION)
+
+    def add_pending(self, write_id, row):
+        """Include a queued row in reads and totals until confirm(write_id)"""
+        new_df = normalize_transactions(self.backend.transaction_headers(), [row])
+        with self._lock:
+            self._pending[write_id] = new_df
+            self._rollup.add(new_df)
+            self._names.add(new_df)
+            self._update_user_names(new_df, add=True)
+            self._changed()
+            for callback in self._listeners:
+                callback(new_df)
+
+    def confirm(self, write_ids):
+        """Swap pending rows the writer has stored for the authoritative copies
+
+        Meant for the writer thread: with the full history loaded it reads the
+        new rows back here, outside the lock, so script threads never wait on
+        that request.
+        """
+        with self._lock:
+            if self.coordinator:
+                # Only our own bump in between means no other process wrote meanwhile
+                generation = self.coordinator.bump(self.GENERATION)
+                if self._fetched_at is not None or generation == self._generation + 1:
+                    self._generation = generation
+            loaded = self._fetched_at is not None
+            position = self._position
+        read = None
+        if loaded:
+            headers = self.backend.transaction_headers()
+            try:
+                read = self.backend.read_transactions(position)
+            except Exception:
+                # Leave it to the next read rather than stopping the writer
+                pass
+        with self._lock:
+            if read is not None and self._position == position:
+                self._merge(headers, *read)
+            elif loaded and self._position == position:
+                self._stale = True
+            # Otherwise a refresh that started after the write has loaded the rows already
+            confirmed = [self._pending.pop(i) for i in write_ids if i in self._pending]
+            for df in confirmed:
+                self._rollup.remove(df)
+                self._names.remove(df)
+                if self._fetched_at is not None:
+                    # The stored copies count in the history once loaded; folded query rows already count
+                    self._update_user_names(df, add=False)
+            if self._fetched_at is None:
+                if len(confirmed) < len(write_ids):
+                    # Rows queued by an earlier process, or already seen by a query: refetch
+                    self._queries.clear()
+                else:
+                    self._fold_into_queries(confirmed)
+            self._changed()
+
+    def poll(self):
+        """Load rows stored since the last load now; returns how many arrived
+
+        The first call loads the full history, after which queries from every
+        session are answered from memory.
+        """
+        with self._lock:
+            self._check_generation()
+            before = len(self._df)
+            self._refresh()
+            return len(self._df) - before
+
+    def get_transactions(self):
+        """Return the shared normalized transaction frame; callers must not modify it"""
+        with self._lock:
+            self._check_generation()
+            if self._needs_refresh():
+                self._refresh()
+            if not self._pending:
+                return self._df
+            if self._view is None:
+                self._view = concat_transactions(self._df, self._pending_frame())
+            return self._view
+
+    def query(self, user=None, start_date=None, end_date=None):
+        """Transactions for one user and/or date range without loading everyone's history
+
+        Served from memory when the full history is already loaded; otherwise the
+        filter is pushed down to the backend and the result cached until invalidated.
+        """
+        key = (user, start_date, end_date)
+        with self._lock:
+            self._check_generation()
+            if self._fetched_at is not None:
+                if self._needs_refresh():
+                    self._refresh()
+                return self._with_pending(self._index.select(self._df, user, start_date, end_date), key)
+            cached = self._queries.get(key)
+            if cached and (self.ttl is None or time.monotonic() - cached[0] < self.ttl):
+                return self._with_pending(cached[1], key)
+        fetched_at = time.monotonic()
+        rows = self.backend.query_transactions(user, start_date, end_date)
+        df = normalize_transactions(self.backend.transaction_headers(), rows)
+        with self._lock:
+            self._drop_stored_pending(df)
+            if len(self._queries) >= self.max_queries:
+                self._queries.pop(next(iter(self._queries)))
+            self._queries[key] = (fetched_at, df)
+            return self._with_pending(df, key)
+
+    def get_daily_rollup(self):
+        """Return per-day totals, maintained as rows are loaded"""
+        with self._lock:
+            self._check_generation()
+            if self._needs_refresh():
+                self._refresh()
+            return self._rollup.frame()
+
+    def suggest_names(self, prefix="", limit=10, user=None):
+        """Payee names starting with prefix, most used and most recent first
+
+        With a user, only that user's own payees, indexed from the same pushed-down
+        query() as their other reads; otherwise across all history, which loads it.
+        """
+        if user is None:
+            with self._lock:
+                self._check_generation()
+                if self._needs_refresh():
+                    self._refresh()
+                return self._names.suggest(prefix, limit)
+        return self._user_name_index(user).suggest(prefix, limit)
+
+    def canonical_name(self, name, user=None):
+        """Usual spelling of a known payee typed with different case or spacing; never reads storage
+
+        With a user, only payees from that user's last suggest_names() count.
+        """
+        with self._lock:
+            if user is None:
+                return self._names.canonical(name)
+            cached = self._user_names.get(user)
+            return cached[1].canonical(name) if cached else name.strip()
+
+    def _user_name_index(self, user):
+        # Built from the user's rows as query() returns them, then kept in step
+        # row by row; rebuilt only once that source is fetched again
+        for attempt in range(2):
+            revision = self.revision
+            df = self.query(user)
+            with self._lock:
+                source = self._user_names_source(user)
+                cached = self._user_names.get(user)
+                if cached is not None and cached[0] == source:
+                    return cached[1]
+                # A row added while df was read would be missed; read it again once
+                if self.revision == revision or attempt:
+                    names = NameIndex()
+                    names.add(df)
+                    self._user_names[user] = (source, names)
+                    return names
+
+    def _user_names_source(self, user):
+        if self._fetched_at is not None:
+            return "history"
+        entry = self._queries.get((user, None, None))
+        return entry[0] if entry else None
+
+    def _update_user_names(self, df, add, loaded=False):
+        # loaded: df was newly loaded into the history rather than queued
+        for user, rows in df.groupby('User', observed=True, sort=False):
+            cached = self._user_names.get(user)
+            if cached is not None and (not loaded or cached[0] == "history"):
+                if add:
+                    cached[1].add(rows)
+                else:
+                    cached[1].remove(rows)
+
+    def _check_generation(self):
+        if self.coordinator is None:
+            return
+        generation = self.coordinator.generation(self.GENERATION)
+        if generation != self._generation:
+            self._generation = generation
+            self._stale = True
+            self._queries.clear()
+
+    def _changed(self):
+        self.revision += 1
+        self._pending_df = None
+        self._view = None
+
+    def _pending_frame(self):
+        if self._pending_df is None:
+            df = pd.DataFrame()
+            for new_df in self._pending.values():
+                df = concat_transactions(df, new_df)
+            self._pending_df = df
+        return self._pending_df
+
+    def _with_pending(self, df, key):
+        if not self._pending:
+            return df
+        pending = _matches(self._pending_frame(), *key)
+        return df if pending.empty else concat_transactions(df, pending)
+
+    def _fold_into_queries(self, confirmed):
+        # Confirmed rows are now stored, so cached query results that cover them
+        # are brought up to date in place of refetching them
+        for key, (fetched_at, df) in list(self._queries.items()):
+            for new_df in confirmed:
+                new_rows = _missing_from(_matches(new_df, *key), df)
+                if not new_rows.empty:
+                    df = concat_transactions(df, new_rows)
+            self._queries[key] = (fetched_at, df)
+
+    def _needs_refresh(self):
+        if self._stale or self._fetched_at is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self._fetched_at >= self.ttl
+
+    def _refresh(self):
+        headers = self.backend.transaction_headers()
+        if self.snapshot and self._fetched_at is None and self._position is None:
+            self._load_snapshot(headers)
+        self._merge(headers, *self.backend.read_transactions(self._position))
+
+    def _merge(self, headers, rows, position):
+        # rows are those stored after self._position, up to position
+        if rows:
+            new_df = normalize_transactions(headers, rows)
+            self._drop_stored_pending(new_df)
+            self._append_frame(new_df)
+        self._position = position
+        self._fetched_at = time.monotonic()
+        self._stale = False
+        if self.snapshot:
+            self.snapshot.save_in_background(self._df, self._position, headers)
+
+    def _drop_stored_pending(self, stored_df):
+        # A read between the writer storing rows and confirm() already returns
+        # them; their pending copies must stop counting at once
+        if not self._pending or stored_df.empty:
+            return
+        stored_df = stored_df[stored_df['Timestamp'].isin(self._pending_frame()['Timestamp'])]
+        available = Counter(_row_keys(stored_df))
+        dropped = False
+        for write_id, df in list(self._pending.items()):
+            keys = _row_keys(df)
+            if all(available[key] > 0 for key in keys):
+                for key in keys:
+                    available[key] -= 1
+                del self._pending[write_id]
+                self._rollup.remove(df)
+                self._names.remove(df)
+                self._update_user_names(df, add=False)
+                dropped = True
+        if dropped:
+            self._changed()
+
+    def _load_snapshot(self, headers):
+        try:
+            df, position = self.snapshot.load(headers)
+        except Exception:
+            logger.warning("Ignoring unreadable transaction snapshot %s", self.snapshot.path, exc_info=True)
+            return
+        if df is not None and not df.empty:
+            self._drop_stored_pending(df)
+            self._append_frame(df)
+            self._position = position
+
+    def _append_frame(self, new_df):
+        if not new_df['Timestamp'].is_monotonic_increasing:
+            new_df = new_df.sort_values('Timestamp', kind='stable', ignore_index=True)
+        self._rollup.add(new_df)
+        self._names.add(new_df)
+        self._update_user_names(new_df, add=True, loaded=True)
+        in_order = self._df.empty or new_df['Timestamp'].iloc[0] >= self._df['Timestamp'].iloc[-1]
+        offset = len(self._df)
+        self._df = merge_transactions(self._df, new_df)
+        if in_order:
+            self._index.extend(new_df, offset)
+        else:
+            # Back-dated rows shift positions, so index the merged frame afresh
+            self._index = TimeIndex(self._df)
+        self._changed()
+        for callback in self._listeners:
+            callback(new_df)
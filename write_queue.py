@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+
+PENDING = "pending"
+RETRYING = "retrying"
+COMMITTED = "committed"
+
+logger = logging.getLogger("tracker.write_queue")
+
+
+def _process_alive(pid):
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows; never treat owners as gone
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class WriteQueue:
+    """Durable local queue that a background thread flushes to storage in batches
+
+    on_commit(ids) runs on the writer thread after each batch is stored; an error
+    in it, or in the queue's own bookkeeping, is logged and never stops the writer.
+    Several processes may share one queue file: each flushes only the rows it
+    submitted, and adopts the unflushed rows of processes that are no longer running.
+    """
+
+    def __init__(self, backend, path, batch_size=100, linger=0.5, base_delay=1.0, max_delay=60.0,
+                 keep_committed=1000, on_commit=None):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.linger = linger
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.keep_committed = keep_committed
+        self.on_commit = on_commit
+        self.owner = os.getpid()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._stored = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS write_queue ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, row TEXT, status TEXT, attempts INTEGER DEFAULT 0, error TEXT)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(write_queue)")]
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE write_queue ADD COLUMN owner INTEGER")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_write_queue_status ON write_queue (status, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_write_queue_owner ON write_queue (owner, status, id)")
+        self._adopt_orphans()
+        self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue a transaction row and return its id for status lookups"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO write_queue (row, status, owner) VALUES (?, ?, ?)", (json.dumps(row), PENDING, self.owner)
+            )
+        self._wake.set()
+        return cursor.lastrowid
+
+    def status(self, ids):
+        """Map each queued id to (status, last error); pruned ids are omitted"""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT id, status, error FROM write_queue WHERE id IN ({placeholders})", list(ids)
+            )
+            return {row[0]: (row[1], row[2]) for row in cursor}
+
+    def stop(self, timeout=5):
+        """Stop the background writer after its current batch"""
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _next_batch(self):
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT id, row, attempts FROM write_queue WHERE status != ? AND owner = ? ORDER BY id LIMIT ?",
+                (COMMITTED, self.owner, self.batch_size)
+            )
+            return cursor.fetchall()
+
+    def _adopt_orphans(self):
+        with self._lock:
+            owners = [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT owner FROM write_queue WHERE status != ?", (COMMITTED,)
+            )]
+            with self._conn:
+                for owner in owners:
+                    if owner is None or (owner != self.owner and not _process_alive(owner)):
+                        self._conn.execute(
+                            "UPDATE write_queue SET owner = ? WHERE status != ? AND owner IS ?",
+                            (self.owner, COMMITTED, owner)
+                        )
+
+    def _run(self):
+        failures = 0
+        while not self._stopped.is_set():
+            try:
+                self._step()
+                failures = 0
+            except Exception:
+                # A failing SQLite call must not end the writer; back off and go again
+                failures += 1
+                logger.warning("Write queue iteration failed", exc_info=True)
+                self._stopped.wait(min(self.max_delay, self.base_delay * 2 ** (failures - 1)))
+
+    def _step(self):
+        if self._stored:
+            # Rows already appended last time; only the bookkeeping failed
+            self._finish()
+            return
+        batch = self._next_batch()
+        if not batch:
+            self._wake.wait()
+            self._wake.clear()
+            # Give a burst of submissions a moment to land in the same batch
+            self._stopped.wait(self.linger)
+            return
+        ids = [item[0] for item in batch]
+        try:
+            self.backend.append_transactions([json.loads(item[1]) for item in batch])
+        except Exception as e:
+            attempts = max(item[2] for item in batch) + 1
+            self._mark(ids, RETRYING, str(e), attempts)
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+            self._stopped.wait(delay * random.uniform(0.5, 1.0))
+            return
+        self._stored = ids
+        self._finish()
+
+    def _finish(self):
+        ids = self._stored
+        self._mark(ids, COMMITTED, None)
+        self._stored = None
+        self._prune(ids[-1])
+        if self.on_commit:
+            try:
+                self.on_commit(ids)
+            except Exception:
+                logger.warning("on_commit callback failed for %d row(s)", len(ids), exc_info=True)
+
+    def _mark(self, ids, status, error, attempts=None):
+        placeholders = ",".join("?" * len(ids))
+        with self._lock, self._conn:
+            if attempts is None:
+                self._conn.execute(
+                    f"UPDATE write_queue SET status = ?, error = ? WHERE id IN ({placeholders})",
+                    [status, error, *ids]
+                )
+            else:
+                self._conn.execute(
+                    f"UPDATE write_queue SET status = ?, error = ?, attempts = ? WHERE id IN ({placeholders})",
+                    [status, error, attempts, *ids]
+                )
+
+    def _prune(self, last_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM write_queue WHERE status = ? AND id <= ?", (COMMITTED, last_id - self.keep_committed)
+            )